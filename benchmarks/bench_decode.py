@@ -0,0 +1,91 @@
+"""Compare decoding observation photos for the 300x300 image canvas.
+
+"resize" is the old display_image path: decode at full resolution, then
+resize to 300x300. "draft" is decode_thumbnail: decode at a reduced scale,
+then make an aspect preserving thumbnail. Each path runs in a fresh process
+so its peak resident memory can be reported (not available on Windows).
+
+    python benchmarks/bench_decode.py --width 4000 --height 3000
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_decode import decode_thumbnail  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+CANVAS = (300, 300)
+
+
+def make_photo(width, height):
+    """Return a JPEG with some structure and noise, roughly like a camera photo."""
+    img = Image.effect_noise((width // 4, height // 4), 64).convert("RGB")
+    img = img.resize((width, height), Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def decode_resize(data):
+    img = Image.open(io.BytesIO(data))
+    return img.resize(CANVAS, Image.LANCZOS)
+
+
+def decode_draft(data):
+    return decode_thumbnail(data, CANVAS)
+
+
+PATHS = {"resize": decode_resize, "draft": decode_draft}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run(name, data, repeat, results):
+    decode = PATHS[name]
+    before = peak_rss_mb()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        img = decode(data)
+        times.append(time.perf_counter() - start)
+    results[name] = (min(times), sorted(times)[len(times) // 2], peak_rss_mb() - before, img.size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    data = make_photo(args.width, args.height)
+    print(f"{args.width}x{args.height} JPEG, {len(data) / 1e6:.1f} MB")
+    with multiprocessing.Manager() as manager:
+        results = manager.dict()
+        for name in PATHS:
+            process = multiprocessing.Process(target=run, args=(name, data, args.repeat, results))
+            process.start()
+            process.join()
+        print(f"{'path':<8} {'best ms':>8} {'median ms':>10} {'peak RSS +MB':>13}  output")
+        for name in PATHS:
+            best, median, peak, size = results[name]
+            print(f"{name:<8} {best * 1000:8.1f} {median * 1000:10.1f} {peak:13.1f}  {size[0]}x{size[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare extracting the gallery image URLs from an observation page.
+
+"soup" is the old get_image_src path: build a BeautifulSoup tree of the
+whole page and search it for img.app-ratio-box-image. "stream" is
+extract_image_sources, which collects the same images with html.parser
+events and no tree. Both are run on the synthetic pages in fixtures/ and
+must find the same images; one of them has a footer inside a gallery card
+and the preview after the page footer.
+
+    python benchmarks/bench_parse.py --repeat 200
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observation_scraper import extract_image_sources  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def parse_soup(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    return [img['src'] for img in soup.find_all('img', {'class': 'app-ratio-box-image'})]
+
+
+def time_per_page(parse, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse(html)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100, help="parses per page and method (default: 100)")
+    args = parser.parse_args()
+
+    try:
+        import bs4  # noqa: F401
+        methods = [("soup", parse_soup), ("stream", extract_image_sources)]
+    except ImportError:
+        print("beautifulsoup4 is not installed, only timing the streaming parser")
+        methods = [("stream", extract_image_sources)]
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        results = {name: parse(html) for name, parse in methods}
+        if len({tuple(sources) for sources in results.values()}) != 1:
+            sys.exit(f"{os.path.basename(path)}: parsers disagree: {results}")
+        print(f"{os.path.basename(path)} ({len(html) / 1024:.0f} KiB, {len(results['stream'])} images)")
+        for name, parse in methods:
+            print(f"  {name:<7} {time_per_page(parse, html, args.repeat) * 1000:8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
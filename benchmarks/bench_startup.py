@@ -0,0 +1,86 @@
+"""Measure the start-up time of the GUIs, as a script or as a frozen build.
+
+Starts the app with --data-file (no file dialog) and HUMMEL_STARTUP_PROBE
+set, which makes it note when the window first appears and when the app is
+ready, and close itself. Reported are the median and worst time-to-window
+and time-to-ready over --runs cold process starts. For reference, the time
+the old start-up spent importing everything before showing anything is
+measured as well.
+
+    python benchmarks/bench_startup.py --rows 100000
+    python benchmarks/bench_startup.py --app flower --frozen dist/pflanzenbestimmung_GUI/pflanzenbestimmung_GUI.exe
+
+Needs a display; the synthetic export is written next to the probe file in
+a temporary directory unless --data-file is given.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+SCRIPTS = {"hummel": "hummelbestimmung_GUI.py", "flower": "pflanzenbestimmung_GUI.py"}
+EAGER_IMPORTS = "import pandas, requests, PIL.ImageTk, observation_data, observation_scraper, image_decode"
+
+
+def start_once(command, data_file, probe_file, timeout):
+    """Run the app once and return (seconds to window, seconds to ready)."""
+    if os.path.exists(probe_file):
+        os.remove(probe_file)
+    env = dict(os.environ, HUMMEL_STARTUP_PROBE=probe_file)
+    start = time.time()
+    subprocess.run(command + ["--data-file", data_file], cwd=REPO_DIR, env=env, timeout=timeout,
+                   stdout=subprocess.DEVNULL, check=True)
+    stages = {}
+    with open(probe_file, encoding="utf-8") as f:
+        for line in f:
+            stage, stamp = line.split()
+            stages[stage] = float(stamp) - start
+    return stages["window"], stages["ready"]
+
+
+def eager_import_seconds():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", EAGER_IMPORTS], cwd=REPO_DIR, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=sorted(SCRIPTS), default="hummel")
+    parser.add_argument("--frozen", help="frozen executable to measure instead of the script")
+    parser.add_argument("--data-file", help="export to open (default: a synthetic export)")
+    parser.add_argument("--rows", type=int, default=50_000, help="rows of the synthetic export (default: 50000)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="hummel_startup_") as directory:
+        data_file = args.data_file
+        if data_file is None:
+            from synthetic_export import write_export
+            data_file = os.path.join(directory, "export.csv")
+            write_export(data_file, args.rows)
+        probe_file = os.path.join(directory, "probe.txt")
+        command = [args.frozen] if args.frozen else [sys.executable, os.path.join(REPO_DIR, SCRIPTS[args.app])]
+        print(f"Starting {' '.join(command)} {args.runs} times")
+
+        windows, readies = [], []
+        for _ in range(args.runs):
+            window, ready = start_once(command, data_file, probe_file, args.timeout)
+            windows.append(window)
+            readies.append(ready)
+            print(f"  window after {window * 1000:7.0f} ms, ready after {ready * 1000:7.0f} ms")
+
+    print(f"time to window: median {statistics.median(windows) * 1000:7.0f} ms, max {max(windows) * 1000:7.0f} ms")
+    print(f"time to ready:  median {statistics.median(readies) * 1000:7.0f} ms, max {max(readies) * 1000:7.0f} ms")
+    if not args.frozen:
+        print(f"eager imports alone (old start-up before any window): {eager_import_seconds() * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the submit_data write-back of data_todo into data_all.
+
+data_todo is the bumblebee work list of a synthetic export. The old
+implementation loops over data_todo and scans the id column of
+data_all for every row. It is far too slow to run completely on 500k rows,
+so it is timed on a sample of rows and extrapolated.
+
+    python benchmarks/bench_submit_data.py --rows 500000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observation_data import HUMMEL_REQUIRED_COLUMNS, add_missing_columns, build_id_index, hummel_todo, write_back  # noqa: E402
+from synthetic_export import make_export  # noqa: E402
+
+EDITED_COLUMNS = ["validator", "man_val", "best_guess", "food_plant", "gender", "flower"]
+
+
+def make_frames(rows, seed=0):
+    data_all = make_export(rows, seed)
+    add_missing_columns(data_all, HUMMEL_REQUIRED_COLUMNS)
+    data_todo = hummel_todo(data_all)
+    data_todo["validator"] = "LK"
+    data_todo["man_val"] = "Bombus terrestris"
+    data_todo["flower"] = "yes"
+    return data_all, data_todo
+
+
+def legacy_write_back(data_all, data_todo):
+    for index, row in data_todo.iterrows():
+        current_id = row["id"]
+        selection = data_all[data_all["id"] == current_id].index[0]
+        for col in EDITED_COLUMNS:
+            data_all.loc[selection, col] = row[col]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy-sample", type=int, default=200, help="rows timed for the old loop")
+    args = parser.parse_args()
+
+    data_all, data_todo = make_frames(args.rows, args.seed)
+    print(f"data_all: {len(data_all)} rows, data_todo: {len(data_todo)} rows")
+
+    sample = data_todo.head(args.legacy_sample)
+    start = time.perf_counter()
+    legacy_write_back(data_all.copy(), sample)
+    legacy = (time.perf_counter() - start) / len(sample) * len(data_todo)
+    print(f"iterrows + mask (extrapolated): {legacy:10.2f} s")
+
+    target = data_all.copy()
+    start = time.perf_counter()
+    all_index = build_id_index(target)
+    indexed = time.perf_counter() - start
+    start = time.perf_counter()
+    write_back(target, data_todo, EDITED_COLUMNS, all_index)
+    vectorized = time.perf_counter() - start
+    print(f"build_id_index:                 {indexed:10.3f} s (once per session)")
+    print(f"write_back:                     {vectorized:10.3f} s")
+    print(f"speedup:                        {legacy / vectorized:10.0f}x")
+
+    check = target.set_index("id").loc[data_todo["id"], EDITED_COLUMNS]
+    assert (check["man_val"] == "Bombus terrestris").all()
+
+
+if __name__ == "__main__":
+    main()
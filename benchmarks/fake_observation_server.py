@@ -0,0 +1,171 @@
+"""Local stand-in for observation.org, for repeatable offline load tests.
+
+Serves an observation page for every /observation/<id>/ path, built from the
+synthetic pages in fixtures/ with the photo ids replaced by ids derived from
+the observation id, and a synthetic JPEG for every /media/photo/<n>.jpg.
+Latency, server errors and 429 responses can be injected.
+
+    python benchmarks/fake_observation_server.py --port 8421 --latency 150 --throttle-rate 0.05
+
+Point an export at it by replacing https://observation.org in the link
+column with http://127.0.0.1:8421, or use load_test.py, which starts the
+server itself.
+"""
+import argparse
+import glob
+import io
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageFilter
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAGE_PATH = re.compile(r"^/observation/(\d+)/?$")
+PHOTO_PATH = re.compile(r"^/media/photo/(\d+)\.jpg$")
+GALLERY_PHOTO = re.compile(r'<img class="app-ratio-box-image[^"]*" src="/media/photo/(\d+)\.jpg')
+PLACEHOLDER = "OBSERVATION_ID"
+
+
+def load_templates():
+    """Return the fixture pages with their gallery photo ids as placeholders."""
+    templates = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        photo_ids = list(dict.fromkeys(GALLERY_PHOTO.findall(html)))
+        for number, photo_id in enumerate(photo_ids):
+            html = html.replace(f"/media/photo/{photo_id}.jpg", f"/media/photo/{PLACEHOLDER}{number:02d}.jpg")
+        templates.append(html)
+    return templates
+
+
+def make_photos(count, width, height):
+    """Return ``count`` JPEGs that look roughly like camera photos."""
+    photos = []
+    for seed in range(count):
+        img = Image.effect_noise((width // 8, height // 8), 48 + seed * 4).convert("RGB")
+        img = img.resize((width, height), Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=88)
+        photos.append(out.getvalue())
+    return photos
+
+
+class FakeObservationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.1, failure_rate=0.0, throttle_rate=0.0, retry_after=1,
+                 photo_size=(1600, 1200), quiet=True):
+        super().__init__(address, FakeObservationHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.quiet = quiet
+        self.templates = load_templates()
+        self.photos = make_photos(8, *photo_size)
+        self.random = random.Random(0)
+        self.lock = threading.Lock()
+        self.counts = {"pages": 0, "photos": 0, "failed": 0, "throttled": 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.uniform(0.5, 1.5)
+
+
+class FakeObservationHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+
+    def do_GET(self):
+        server = self.server
+        outcome, jitter = server.draw()
+        time.sleep(server.latency * jitter)
+        if outcome < server.throttle_rate:
+            server.count("throttled")
+            return self.reply(429, b"Too Many Requests", "text/plain", {"Retry-After": str(server.retry_after)})
+        if outcome < server.throttle_rate + server.failure_rate:
+            server.count("failed")
+            return self.reply(500, b"Internal Server Error", "text/plain")
+
+        path = self.path.split("?")[0]
+        page = PAGE_PATH.match(path)
+        if page:
+            obs_id = int(page.group(1))
+            server.count("pages")
+            html = server.templates[obs_id % len(server.templates)].replace(PLACEHOLDER, str(obs_id))
+            return self.reply(200, html.encode("utf-8"), "text/html; charset=utf-8")
+        photo = PHOTO_PATH.match(path)
+        if photo:
+            server.count("photos")
+            return self.reply(200, server.photos[int(photo.group(1)) % len(server.photos)], "image/jpeg")
+        self.reply(404, b"Not Found", "text/plain")
+
+    def reply(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def start_server(port=0, **options):
+    """Start a FakeObservationServer on a daemon thread and return it."""
+    server = FakeObservationServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-observation-org", daemon=True).start()
+    return server
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency", type=float, default=100, help="mean response latency in ms (default: 100)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of 500 responses (default: 0)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses (default: 0)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of 429 responses in s (default: 1)")
+    parser.add_argument("--photo-size", type=int, nargs=2, default=(1600, 1200), metavar=("WIDTH", "HEIGHT"),
+                        help="size of the synthetic photos (default: 1600 1200)")
+
+
+def server_options(args):
+    return {
+        "latency": args.latency / 1000,
+        "failure_rate": args.failure_rate,
+        "throttle_rate": args.throttle_rate,
+        "retry_after": args.retry_after,
+        "photo_size": tuple(args.photo_size),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8421, help="port to listen on (default: 8421)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeObservationServer(("127.0.0.1", args.port), quiet=False, **server_options(args))
+    print(f"Serving fake observation.org on {server.base_url}, e.g. {server.base_url}/observation/281904711/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Served {server.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Replay a work list against the local observation.org stand-in.
+
+Starts fake_observation_server.py in-process and walks through the work
+list the way a validator does in the GUI: open an observation, wait until
+its first image is decoded for the canvas, look at it for --think-time
+seconds and go to the next one, while ImagePrefetcher loads the next
+observations in the background. Reports p50/p99 time-to-first-image and
+the throughput. The caches live in a temporary directory, so every run
+starts cold.
+
+    python benchmarks/load_test.py --observations 200 --latency 150 --throttle-rate 0.02
+    python benchmarks/load_test.py --data-file export.csv --app flower --think-time 0.5
+
+With --data-file, the links of the export are rewritten to the local server.
+--users runs several validators at once, each on its own part of the list.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fake_observation_server import add_server_arguments, server_options, start_server  # noqa: E402
+
+
+def work_list_links(args, base_url):
+    if args.data_file is None:
+        first = 281900000
+        return [f"{base_url}/observation/{first + i}/" for i in range(args.observations)]
+    from prefetch_archive import select_links
+    data_todo, links = select_links(args.data_file, args.app, args.observations)
+    return [base_url + urlsplit(link).path for link in links]
+
+
+def replay(links, think_time, results, lock):
+    """Walk through ``links`` like the GUI and append (link, seconds or None) to ``results``."""
+    from image_decode import decode_thumbnail
+    from image_prefetch import ImagePrefetcher
+    from observation_scraper import download_image, get_image_src
+
+    prefetcher = ImagePrefetcher(get_image_src, download_image)
+    try:
+        for index, link in enumerate(links):
+            start = time.perf_counter()
+            prefetcher.prefetch(prefetcher.window(links, index))
+            try:
+                image_urls = prefetcher.image_urls(link)
+                decode_thumbnail(prefetcher.image_bytes(image_urls[0]), (300, 300))
+                elapsed = time.perf_counter() - start
+            except Exception as e:
+                print(f"Failed {link}: {e}", file=sys.stderr)
+                elapsed = None
+            with lock:
+                results.append((link, elapsed))
+            time.sleep(think_time)
+    finally:
+        prefetcher.shutdown()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-file", help="replay the work list of this export instead of synthetic links")
+    parser.add_argument("--app", choices=["hummel", "flower"], default="hummel", help="work list of --data-file")
+    parser.add_argument("--observations", type=int, default=100, help="number of observations (default: 100)")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="seconds spent on each observation (default: 1.0)")
+    parser.add_argument("--users", type=int, default=1, help="validators working at the same time (default: 1)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    # Cold, private caches; must be set before observation_scraper is imported
+    cache_dir = tempfile.TemporaryDirectory(prefix="hummel_load_test_")
+    os.environ["HUMMEL_CACHE_DIR"] = cache_dir.name
+    import http_client
+
+    server = start_server(**server_options(args))
+    links = work_list_links(args, server.base_url)
+    print(f"Replaying {len(links)} observations against {server.base_url} with {args.users} users")
+
+    results = []
+    lock = threading.Lock()
+    shares = [links[user::args.users] for user in range(args.users)]
+    threads = [threading.Thread(target=replay, args=(share, args.think_time, results, lock)) for share in shares]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    times = [seconds for link, seconds in results if seconds is not None]
+    failed = len(results) - len(times)
+    http = http_client.stats.snapshot()
+    print(f"{len(times)} observations shown, {failed} failed in {elapsed:.1f} s")
+    if times:
+        print(f"time to first image: p50 {percentile(times, 0.5) * 1000:.0f} ms, "
+              f"p99 {percentile(times, 0.99) * 1000:.0f} ms, mean {statistics.mean(times) * 1000:.0f} ms, "
+              f"max {max(times) * 1000:.0f} ms")
+    print(f"throughput: {len(times) / elapsed:.2f} obs/s, {http['requests'] / elapsed:.1f} req/s, "
+          f"{http['bytes'] / 1e6 / elapsed:.2f} MB/s")
+    print(f"server: {server.counts}")
+    print(f"HTTP statistics: {http}")
+    print(f"Rate limiter: {http_client.limiter.status()}")
+    cache_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Time the hot paths of the apps on a synthetic export and store the results as JSON.
+
+Every benchmark runs --repeat times after an untimed warm-up; the minimum,
+median and mean are stored together with the versions of Python, pandas and
+Pillow and the git commit, so runs on the same machine can be compared:
+
+    python benchmarks/run_benchmarks.py --rows 200000
+    python benchmarks/run_benchmarks.py --rows 200000 --compare benchmarks/results/<earlier run>.json
+
+With --compare, benchmarks whose median got slower by more than --threshold
+are reported as regressions and the exit status is 1. --only selects
+benchmarks whose name contains one of the given words.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import PIL
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+from bench_decode import make_photo  # noqa: E402
+from image_decode import decode_thumbnail  # noqa: E402
+from observation_data import (  # noqa: E402
+    FLOWER_REQUIRED_COLUMNS, HUMMEL_REQUIRED_COLUMNS, add_missing_columns, build_id_index, dialect_path,
+    flower_todo, hummel_todo, load_observations, read_csv_flexible, sidecar_path, write_back,
+)
+from observation_store import import_csv  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from synthetic_export import meta_options, write_export  # noqa: E402
+
+EDITED_COLUMNS = ["validator", "man_val", "best_guess", "food_plant", "gender", "flower"]
+ROW_OPERATIONS = 1000
+# Typed one character at a time into a plant combobox, the last one with a typo
+TYPED_QUERIES = ["achillea mill", "bombus pascuorum", "trifolium prat", "tarxacum"]
+
+BENCHMARKS = []
+
+
+def benchmark(name, setup=None):
+    """Register ``fn(context)`` as benchmark ``name``; ``setup(context)`` runs untimed before every run."""
+    def register(fn):
+        BENCHMARKS.append((name, fn, setup))
+        return fn
+    return register
+
+
+class Context():
+    """Export file and frames shared by the benchmarks."""
+
+    def __init__(self, rows, seed):
+        self.directory = tempfile.mkdtemp(prefix="hummel_bench_")
+        self.export = os.path.join(self.directory, "export.csv")
+        self.output = os.path.join(self.directory, "submitted.csv")
+        self.data_all = write_export(self.export, rows, seed)
+        add_missing_columns(self.data_all, FLOWER_REQUIRED_COLUMNS)
+        self.all_index = build_id_index(self.data_all)
+        self.data_todo = hummel_todo(self.data_all)
+        self.todo_index = build_id_index(self.data_todo)
+        rng = np.random.default_rng(seed)
+        self.sample_ids = rng.choice(self.data_todo["id"].to_numpy(), size=ROW_OPERATIONS).tolist()
+        self.bees, self.plants = meta_options()
+        self.plant_index = SearchIndex(self.plants)
+        self.photo = make_photo(4000, 3000)
+        self.store = quiet(import_csv, self.export, os.path.join(self.directory, "export.db"))
+        self.store.add_missing_columns(FLOWER_REQUIRED_COLUMNS)
+
+    def cleanup(self):
+        self.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def quiet(fn, *args):
+    # The loaders report what they read, which would drown the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def forget_dialect(ctx):
+    for path in (dialect_path(ctx.export), sidecar_path(ctx.export)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@benchmark("read_csv_flexible.sniff", setup=forget_dialect)
+def bench_read_sniff(ctx):
+    quiet(read_csv_flexible, ctx.export)
+
+
+@benchmark("read_csv_flexible.cached_dialect")
+def bench_read_cached(ctx):
+    quiet(read_csv_flexible, ctx.export)
+
+
+@benchmark("load_observations.sidecar")
+def bench_load_sidecar(ctx):
+    quiet(load_observations, ctx.export)
+
+
+@benchmark("todo.hummel")
+def bench_hummel_todo(ctx):
+    hummel_todo(ctx.data_all)
+
+
+@benchmark("todo.flower")
+def bench_flower_todo(ctx):
+    flower_todo(ctx.data_all)
+
+
+@benchmark("build_id_index")
+def bench_build_id_index(ctx):
+    build_id_index(ctx.data_all)
+
+
+@benchmark(f"row.lookup_x{ROW_OPERATIONS}")
+def bench_row_lookup(ctx):
+    # What row_selected and update_fields do for every observation shown
+    for obs_id in ctx.sample_ids:
+        current_row = ctx.data_todo.iloc[ctx.todo_index[obs_id]]
+        [current_row[col] for col in HUMMEL_REQUIRED_COLUMNS]
+
+
+@benchmark(f"row.save_x{ROW_OPERATIONS}")
+def bench_row_save(ctx):
+    # What save_current_row does for every observation validated
+    for obs_id in ctx.sample_ids:
+        selection = ctx.todo_index[obs_id]
+        ctx.data_todo.loc[selection, "man_val"] = "Bombus pascuorum"
+        ctx.data_todo.loc[selection, "best_guess"] = "Bombus pascuorum"
+        ctx.data_todo.loc[selection, "food_plant"] = "Trifolium pratense"
+        ctx.data_todo.loc[selection, "gender"] = "female"
+        ctx.data_todo.loc[selection, "validator"] = "LK"
+        ctx.data_todo.loc[selection, "flower"] = "yes"
+
+
+@benchmark("submit.write_back")
+def bench_write_back(ctx):
+    write_back(ctx.data_all, ctx.data_todo, EDITED_COLUMNS, ctx.all_index)
+
+
+@benchmark("submit.export_csv")
+def bench_export_csv(ctx):
+    ctx.data_all.to_csv(ctx.output, sep=";", index=False)
+
+
+@benchmark("store.todo_hummel")
+def bench_store_todo(ctx):
+    ctx.store.todo("hummel")
+
+
+@benchmark(f"store.update_x{ROW_OPERATIONS}")
+def bench_store_update(ctx):
+    # What journal_row does for every saved row when a database is open
+    values = {"validator": "LK", "man_val": "Bombus pascuorum", "best_guess": None,
+              "food_plant": "Trifolium pratense", "gender": "female", "flower": "yes"}
+    for obs_id in ctx.sample_ids:
+        ctx.store.update(obs_id, values)
+
+
+@benchmark("store.export_csv")
+def bench_store_export(ctx):
+    ctx.store.export_csv(ctx.output)
+
+
+@benchmark("combobox.build_index")
+def bench_combobox_index(ctx):
+    SearchIndex(ctx.plants + ctx.bees)
+
+
+@benchmark("combobox.filter_typing")
+def bench_combobox_filter(ctx):
+    for query in TYPED_QUERIES:
+        for end in range(1, len(query) + 1):
+            ctx.plant_index.rank(query[:end], limit=50)
+
+
+@benchmark("decode.canvas_12mp")
+def bench_decode_canvas(ctx):
+    decode_thumbnail(ctx.photo, (300, 300))
+
+
+@benchmark("decode.thumbnail_12mp")
+def bench_decode_thumbnail(ctx):
+    decode_thumbnail(ctx.photo, (64, 64))
+
+
+def run(ctx, fn, setup, repeat):
+    if setup is not None:
+        setup(ctx)
+    fn(ctx)  # Warm-up, fills caches and sidecars like a second session would see them
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup(ctx)
+        start = time.perf_counter()
+        fn(ctx)
+        runs.append(time.perf_counter() - start)
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+        "runs": runs,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print the change against ``baseline_path`` and return the names of regressed benchmarks."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["meta"]["rows"] != results["meta"]["rows"]:
+        print(f"Warning: baseline used {baseline['meta']['rows']} rows, this run {results['meta']['rows']}")
+    regressions = []
+    print(f"\n{'benchmark':<34} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<34} {'-':>10} {result['median'] * 1000:9.2f}ms")
+            continue
+        ratio = result["median"] / before["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<34} {before['median'] * 1000:9.2f}ms {result['median'] * 1000:9.2f}ms "
+              f"{(ratio - 1) * 100:+7.0f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="rows of the synthetic export (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (default: 5)")
+    parser.add_argument("--only", nargs="+", help="run only benchmarks whose name contains one of these")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<date>_<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown of the median counted as regression (default: 0.2)")
+    args = parser.parse_args()
+
+    selected = [(name, fn, setup) for name, fn, setup in BENCHMARKS
+                if not args.only or any(word in name for word in args.only)]
+    print(f"Generating a synthetic export with {args.rows} rows")
+    ctx = Context(args.rows, args.seed)
+    commit = git_commit()
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "rows": args.rows,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    try:
+        for name, fn, setup in selected:
+            result = run(ctx, fn, setup, args.repeat)
+            results["results"][name] = result
+            print(f"{name:<34} median {result['median'] * 1000:9.2f} ms   min {result['min'] * 1000:9.2f} ms")
+    finally:
+        ctx.cleanup()
+
+    out = args.out or os.path.join(BENCHMARK_DIR, "results", f"{time.strftime('%Y%m%d_%H%M%S')}_{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Generate synthetic observation.org exports for the benchmarks.
+
+The frames have the columns the apps work with (id, link, landuse,
+validator.name, validator, flower and flower_validator) plus the usual
+descriptive export columns, with value distributions chosen so that both
+work lists select a realistic share of the rows. The same seed always gives
+the same export.
+
+    python benchmarks/synthetic_export.py export.csv --rows 500000
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+META_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "meta.csv")
+
+LANDUSE = ["AX_Landwirtschaft", "AX_Wald", "AX_Siedlung", "AX_Gehoelz", "AX_Unland"]
+LANDUSE_WEIGHTS = [0.45, 0.2, 0.2, 0.1, 0.05]
+VALIDATOR_NAMES = [None, "Photo recognition api", "Automatic validation", "Anna Berger", "Jonas Maier", "Sofia Ott"]
+VALIDATOR_NAME_WEIGHTS = [0.35, 0.25, 0.1, 0.1, 0.1, 0.1]
+VALIDATORS = [None, "LK", "Test", "SO", "JM"]
+VALIDATOR_WEIGHTS = [0.7, 0.1, 0.02, 0.09, 0.09]
+FLOWER = [None, "yes", "no", "unknown"]
+FLOWER_WEIGHTS = [0.6, 0.25, 0.1, 0.05]
+FLOWER_VALIDATORS = [None, "LK", "Test", "SO"]
+FLOWER_VALIDATOR_WEIGHTS = [0.8, 0.1, 0.02, 0.08]
+
+
+def meta_options():
+    """Return the bumblebee and plant names of meta.csv, as offered in the GUIs."""
+    meta_data = pd.read_csv(META_FILE, sep=";", encoding="latin-1")
+    return meta_data["bees"].dropna().unique().tolist(), meta_data["plants"].dropna().unique().tolist()
+
+
+def make_export(rows, seed=0):
+    """Return a DataFrame that looks like an observation.org export with ``rows`` rows."""
+    rng = np.random.default_rng(seed)
+    bees, plants = meta_options()
+
+    def pick(values, weights):
+        return pd.Series(np.array(values, dtype=object)[rng.choice(len(values), size=rows, p=weights)])
+
+    ids = rng.permutation(np.arange(200_000_000, 200_000_000 + rows))
+    dates = pd.Timestamp("2023-04-01") + pd.to_timedelta(rng.integers(0, 180, size=rows), unit="D")
+    return pd.DataFrame({
+        "id": ids,
+        "species.name": pick(bees, None),
+        "date": dates.strftime("%Y-%m-%d"),
+        "number": rng.integers(1, 6, size=rows),
+        "lat": np.round(rng.uniform(47.5, 54.5, size=rows), 6),
+        "lng": np.round(rng.uniform(6.0, 14.5, size=rows), 6),
+        "user.name": pick([f"Observer {i}" for i in range(500)], None),
+        "link": [f"https://observation.org/observation/{obs_id}/" for obs_id in ids],
+        "landuse": pick(LANDUSE, LANDUSE_WEIGHTS),
+        "validator.name": pick(VALIDATOR_NAMES, VALIDATOR_NAME_WEIGHTS),
+        "validator": pick(VALIDATORS, VALIDATOR_WEIGHTS),
+        "flower": pick(FLOWER, FLOWER_WEIGHTS),
+        "flower_validator": pick(FLOWER_VALIDATORS, FLOWER_VALIDATOR_WEIGHTS),
+        "food_plant": pick([None] + plants[:20], None),
+    })
+
+
+def write_export(path, rows, seed=0, sep=";", encoding="utf-8"):
+    """Write a synthetic export to ``path`` and return it as a DataFrame."""
+    df = make_export(rows, seed)
+    df.to_csv(path, sep=sep, encoding=encoding, index=False)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--rows", type=int, default=100_000, help="number of observations (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sep", default=";", help="column separator (default: ;)")
+    parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args()
+    write_export(args.path, args.rows, args.seed, args.sep, args.encoding)
+    print(f"Wrote {args.rows} observations to {args.path} ({os.path.getsize(args.path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import time
+
+from image_cache import default_cache_dir
+
+
+def journal_path(data_file_path):
+    """Return the journal file belonging to a data file."""
+    return f"{data_file_path}.journal"
+
+
+def fallback_journal_path(data_file_path):
+    """Return the journal used when the directory of the data file is not writable."""
+    digest = hashlib.sha1(os.path.abspath(data_file_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(default_cache_dir(), "journals", f"{os.path.basename(data_file_path)}.{digest}.journal")
+
+
+class EditJournal():
+    """Append-only log of the edits made to single observations.
+
+    Every saved row is written as one JSON line and flushed to the operating
+    system right away, so a crash of the app loses nothing. The more expensive
+    ``fsync`` that also protects against power loss is done in batches, after
+    ``sync_every`` entries or ``sync_seconds`` seconds, whichever comes first.
+    """
+
+    def __init__(self, path, sync_every=20, sync_seconds=5.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_seconds = sync_seconds
+        self.file = open(path, "a", encoding="utf-8")
+        self.pending = 0
+        if self._ends_with_torn_line():
+            self.file.write("\n")
+        self.last_sync = time.monotonic()
+
+    def _ends_with_torn_line(self):
+        if os.path.getsize(self.path) == 0:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def append(self, obs_id, values):
+        """Record the current ``values`` (column -> value) of observation ``obs_id``."""
+        entry = {"id": obs_id, "time": time.time(), "values": values}
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.pending += 1
+        if self.pending >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_seconds:
+            self.sync()
+
+    def merge(self, path):
+        """Move the entries of the journal at ``path`` into this one and delete it."""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self.file.write(line if line.endswith("\n") else line + "\n")
+                    self.pending += 1
+        self.file.flush()
+        self.sync()
+        os.remove(path)
+
+    def sync(self):
+        if self.pending:
+            os.fsync(self.file.fileno())
+            self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def clear(self):
+        """Empty the journal, e.g. after its edits were written to the data file."""
+        self.file.truncate(0)
+        self.file.seek(0)
+        self.sync()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+
+def open_journal(data_file_path):
+    """Open the journal of a data file, or None if no journal can be written.
+
+    The journal lives next to the data file. If that directory is read-only
+    (a network share, a write-protected stick), a journal in the cache
+    directory is used instead; once the data file's own journal can be
+    written again, the entries of that fallback are moved into it.
+    """
+    path = journal_path(data_file_path)
+    fallback = fallback_journal_path(data_file_path)
+    try:
+        journal = EditJournal(path)
+    except OSError as e:
+        print(f"Could not open the edit journal '{path}': {e}")
+    else:
+        if os.path.exists(fallback):
+            try:
+                journal.merge(fallback)
+            except OSError as e:
+                print(f"Could not merge the edit journal '{fallback}': {e}")
+        return journal
+    try:
+        os.makedirs(os.path.dirname(fallback), exist_ok=True)
+        journal = EditJournal(fallback)
+    except OSError as e:
+        print(f"Could not open the edit journal '{fallback}': {e}; edits are kept only until they are submitted")
+        return None
+    print(f"Journaling edits to '{fallback}'")
+    return journal
+
+
+def _read_entries(path):
+    if not os.path.isfile(path):
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # A line torn by a crash while it was written
+    return entries
+
+
+def read_edits(data_file_path):
+    """Return the latest journaled values of every observation as {id: {column: value}}.
+
+    Reads the journal next to the data file and its fallback in the cache
+    directory, and applies their entries in the order they were made.
+    """
+    entries = _read_entries(journal_path(data_file_path)) + _read_entries(fallback_journal_path(data_file_path))
+    entries.sort(key=lambda entry: entry.get("time", 0))
+    edits = {}
+    for entry in entries:
+        edits.setdefault(entry["id"], {}).update(entry["values"])
+    return edits
@@ -0,0 +1,161 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from rate_limiter import BACKGROUND, INTERACTIVE, RateLimiter  # noqa: F401
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+MAX_CONNECTIONS_PER_HOST = 6
+USER_AGENT = "bumblebee_ID_GUI"
+THROTTLE_RETRIES = 3
+
+
+class HttpStats():
+    """Thread-safe counters describing the traffic of the shared session."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.handshakes = 0
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def add(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "handshakes": self.handshakes,
+                "requests": self.requests,
+                "failures": self.failures,
+                "throttled": self.throttled,
+                "bytes": self.bytes,
+                "seconds": round(self.seconds, 3),
+                "reused_connections": max(self.requests - self.handshakes, 0),
+            }
+
+
+stats = HttpStats()
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        stats.add(handshakes=1)
+        return super()._new_conn()
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        stats.add(handshakes=1)
+        return super()._new_conn()
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that keeps connections alive and counts new connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+class ServerErrorRetry(Retry):
+    """Retry policy that leaves 429 responses to the rate limiter."""
+
+    RETRY_AFTER_STATUS_CODES = frozenset([503])
+
+
+def make_session(max_connections=MAX_CONNECTIONS_PER_HOST, retries=3):
+    """Create a session with pooled keep-alive connections and a retry policy."""
+    retry = ServerErrorRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    # pool_block keeps the number of open connections per host at max_connections
+    adapter = PooledAdapter(pool_connections=4, pool_maxsize=max_connections, pool_block=True, max_retries=retry)
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = make_session()
+
+# Shared by every scrape and download; the interactive request may use one
+# connection more than the limiter's window
+limiter = RateLimiter(max_concurrency=MAX_CONNECTIONS_PER_HOST - 1)
+
+
+def retry_after_seconds(response):
+    """Return the delay requested by a Retry-After header in seconds, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), priority=BACKGROUND, **kwargs):
+    """GET ``url`` through the shared session and return the response.
+
+    Every attempt waits for the rate limiter with ``priority`` (INTERACTIVE or
+    BACKGROUND). A 429 response is retried up to THROTTLE_RETRIES times, after
+    the Retry-After delay (one second if there is none). Raises requests.exceptions.RequestException for
+    connection problems, timeouts and HTTP error statuses.
+    """
+    for attempt in range(THROTTLE_RETRIES + 1):
+        limiter.acquire(priority)
+        start = time.perf_counter()
+        latency, failed, retry_after = None, True, None
+        try:
+            response = session.get(url, timeout=timeout, **kwargs)
+            throttled = response.status_code == 429
+            # The time until the headers arrived, so large images do not count as slow
+            latency = response.elapsed.total_seconds()
+            failed = throttled or response.status_code >= 500
+            retry_after = (retry_after_seconds(response) or 1.0) if throttled else None
+        except requests.exceptions.RequestException:
+            stats.add(requests=1, failures=1, seconds=time.perf_counter() - start)
+            raise
+        finally:
+            # Whatever session.get raised, the slot goes back to the limiter
+            limiter.release(time.perf_counter() - start if latency is None else latency,
+                            failed=failed, retry_after=retry_after)
+        if throttled and attempt < THROTTLE_RETRIES:
+            stats.add(requests=1, throttled=1, seconds=time.perf_counter() - start)
+            continue
+        try:
+            response.raise_for_status()
+            content = response.content
+        except requests.exceptions.RequestException:
+            stats.add(requests=1, failures=1, throttled=int(throttled), seconds=time.perf_counter() - start)
+            raise
+        stats.add(requests=1, bytes=len(content), seconds=time.perf_counter() - start)
+        return response
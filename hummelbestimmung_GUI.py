@@ -1,89 +1,146 @@
-import requests
-from bs4 import BeautifulSoup
-from PIL import Image, ImageTk
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
 import os
+import argparse
+import time
 import webbrowser
-import pyperclip
 from searchable_combobox import SearchableComboBox
-import pandas as pd
-import io
-
-# ------Load Meta Data------
-meta_file = "meta.csv"
-meta_data = pd.read_csv(meta_file, sep=";", encoding="latin-1")
-
-validator_options = meta_data["validator"].dropna().unique().tolist()
-bees_options = meta_data["bees"].dropna().unique().tolist()
-plants_options = meta_data["plants"].dropna().unique().tolist()
-gender_options = ["male", "female", "unknown"]
+from image_prefetch import ImagePrefetcher
+from ui_worker import UiWorker
+from observation_browser import ObservationBrowser
+from photo_cache import PhotoCache
+from thumbnail_strip import THUMB_SIZE, ThumbnailStrip
+from edit_journal import open_journal, read_edits
+import perf
+from startup import StartupProgress, finished, preload
+
+# ------Start------
+# Show the window first: pandas, requests and Pillow are imported on a
+# background thread meanwhile, and the slow loading steps report progress
+preloading = preload()
+root = tk.Tk()
+root.title("Hummel-Challenge")
+progress = StartupProgress(root, steps=5)
+
+# ------Command line------
+parser = argparse.ArgumentParser(description="Validate observations from an observation.org export.")
+parser.add_argument("--archive", default=os.environ.get("HUMMEL_ARCHIVE"),
+                    help="offline image archive built with prefetch_archive.py")
+parser.add_argument("--bundle", default=os.environ.get("HUMMEL_BUNDLE"),
+                    help="observation bundle built with observation_bundle.py")
+parser.add_argument("--perf", action="store_true", default=os.environ.get("HUMMEL_PERF", "") not in ("", "0"),
+                    help="log timings of this session and print a performance summary on exit")
+parser.add_argument("--data-file", help="data file to open instead of asking for it")
+args, _ = parser.parse_known_args()
 
 # ------READ DATA------
 def select_file():
-    root = tk.Tk()
-    root.withdraw()
-    root.attributes('-topmost', 1)
     file_path = filedialog.askopenfilename(
+        parent=root,
         title="Select the data file",
-        filetypes=(("CSV files", "*.csv"), ("All files", "*.*"))
+        filetypes=(("CSV files", "*.csv"), ("Observation databases", "*.db *.sqlite"), ("All files", "*.*"))
     )
-    root.destroy()
     return file_path
 
-def read_csv_flexible(filepath):
-    for encoding in ['utf-8', 'cp1252', 'latin1']:
-        try:
-            df = pd.read_csv(filepath, sep=',', encoding=encoding)
-            return df
-        except Exception:
-            try:
-                df = pd.read_csv(filepath, sep=';', encoding=encoding)
-                return df
-            except Exception:
-                continue
-    raise ValueError(f"Failed to read file '{filepath}' with common encodings and separators.")
 
+data_file_path = args.data_file or select_file()
+if not data_file_path:
+    raise SystemExit("No data file selected.")
+
+progress.run("Loading modules...", preloading.join)
+from PIL import ImageTk  # noqa: E402
+from image_decode import decode_thumbnail  # noqa: E402
+from observation_scraper import ScrapeError, download_image, get_image_src, open_archive, open_bundle  # noqa: E402
+import http_client  # noqa: E402
+from observation_data import (  # noqa: E402
+    HUMMEL_REQUIRED_COLUMNS, add_missing_columns, apply_edits, build_id_index, hummel_todo,
+    load_observations, write_back,
+)
+from observation_store import ObservationStore, is_store  # noqa: E402
+import pandas as pd  # noqa: E402
+
+if args.perf:
+    print(f"Performance log: {perf.enable()}")
+if args.bundle:
+    open_bundle(args.bundle)
+if args.archive:
+    open_archive(args.archive)
 
-# ------Load the Data------
-data_file_path = select_file()
-data_all = read_csv_flexible(data_file_path)
+# ------Load Meta Data------
+meta_file = "meta.csv"
+meta_data = pd.read_csv(meta_file, sep=";", encoding="latin-1")
+
+validator_options = meta_data["validator"].dropna().unique().tolist()
+bees_options = meta_data["bees"].dropna().unique().tolist()
+plants_options = meta_data["plants"].dropna().unique().tolist()
+gender_options = ["male", "female", "unknown"]
 
-# Ensure necessary columns exist
-required_columns = ["man_val", "best_guess", "food_plant", "gender", "validator", "flower"]
-for col in required_columns:
-    if col not in data_all.columns:
-        data_all[col] = None
+# ------Load the Data------
+store = None
+journal = None
+if is_store(data_file_path):
+    # Saved rows are written to the database at once; there is no frame of all observations
+    store = progress.run("Opening the database...", ObservationStore, data_file_path)
+    store.add_missing_columns(HUMMEL_REQUIRED_COLUMNS)
+    data_all = None
+else:
+    data_all = progress.run("Reading the data file...", load_observations, data_file_path)
+
+    add_missing_columns(data_all, HUMMEL_REQUIRED_COLUMNS)
+
+    progress.step("Restoring unsaved edits...")
+    all_index = build_id_index(data_all)
+
+    # Replay the edits of earlier sessions that were not exported to the data file yet
+    restored = apply_edits(data_all, read_edits(data_file_path), all_index)
+    if restored:
+        print(f"Restored edits of {restored} observations from the edit journal")
+    journal = open_journal(data_file_path)
+
+# Columns edited in the app and written back to data_all on save
+edited_columns = ["validator", "man_val", "best_guess", "food_plant", "gender", "flower"]
 
 # Filter the data based on conditions
-data_todo = data_all[
-    (data_all["validator.name"].isna() | (data_all["validator.name"] == "Photo recognition api") | (data_all["validator.name"] == "Automatic validation"))
-    & (data_all["landuse"] == "AX_Landwirtschaft") & (data_all["validator"].isna() | (data_all["validator"].isin(["LK", "Test"])))
-]
-data_todo = data_todo.reset_index(drop=True)
-
-
-# Scrape the image URL
-def get_image_src(url):
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # images = soup.find_all('img', {'class': 'app-ratio-box-image'}) # old
-        images = soup.find_all('img', {'class': 'app-ratio-box-image'})
-        print(images)
-        img_sans_preview = images[:-1]
-        img_url_lst = []
-        for img in img_sans_preview:
-            url_ending = img['src'].rsplit('?')[0]
-            img_url_lst.append(f"https://observation.org{url_ending}")
-        if len(img_url_lst) != 0:
-            return img_url_lst
-        else:
-            return "Image tag with the specified criteria not found."
-    except requests.exceptions.RequestException as e:
-        return f"An error occurred: {e}"
+progress.step("Selecting the observations to validate...")
+if store is not None:
+    data_todo = store.todo("hummel")
+else:
+    data_todo = hummel_todo(data_all)
+
+# Observation id -> row label, so that navigation does not scan the id column
+# (all_index for data_all is built above, before the journal is replayed)
+todo_index = build_id_index(data_todo)
+
+
+# ------Observation status------
+def filled(column):
+    return data_todo[column].notna() & (data_todo[column] != "")
+
+def is_filled(value):
+    return pd.notna(value) and value != ""
+
+def row_statuses():
+    """Return the status of every row of data_todo for the observation browser."""
+    validated = filled("validator")
+    status = pd.Series("unvalidated", index=data_todo.index)
+    status[validated] = "flagged"  # Validated, but no classification entered
+    status[validated & filled("man_val")] = "done"
+    return status.tolist()
+
+def row_status(position):
+    """Return the status of one row of data_todo, like row_statuses."""
+    if not is_filled(data_todo.at[position, "validator"]):
+        return "unvalidated"
+    return "done" if is_filled(data_todo.at[position, "man_val"]) else "flagged"
+
+def row_label(position):
+    """Return the current classification of a row of data_todo."""
+    for column in ["man_val", "best_guess"]:
+        value = data_todo.at[position, column]
+        if pd.notna(value) and value != "":
+            return value
+    return ""
 
 # ------Tkinter Application------
 class HummelApp:
@@ -102,15 +159,29 @@ class HummelApp:
         
         self.current_index = 0
         self.previous_id = data_todo["id"].iloc[0]
+        self.image_urls = []
+
+        # Scrape and download the images of the neighbouring rows in the background
+        self.links = data_todo["link"].tolist()
+        self.prefetcher = ImagePrefetcher(get_image_src, download_image)
+        # Scraping, downloading and decoding of the displayed images runs off the Tk thread
+        self.worker = UiWorker(root)
+        # Rendered images, so flipping between images only redraws the canvas
+        self.photo_cache = PhotoCache()
+        # Thumbnails get their own threads, so they never queue ahead of the displayed image
+        self.thumb_worker = UiWorker(root, max_workers=2)
+        self.thumb_jobs = []  # Pending thumbnail futures of the current row
+        self.thumb_generation = 0  # Increased on every row change to drop late thumbnails
 
         # Dropdown for observation selection
         self.row_label = tk.Label(root, text="Select Observation:")
         self.row_label.grid(row=0, column=0, padx=10, pady=10)
 
-        self.row_dropdown = ttk.Combobox(root, values=data_todo["id"].tolist(), state="readonly")
+        self.row_dropdown = ObservationBrowser(root, data_todo["id"].tolist(), todo_index, row_statuses, row_status,
+                                               row_label,
+                                               command=self.row_selected)
         self.row_dropdown.grid(row=0, column=1, padx=10, pady=10)
-        self.row_dropdown.current(0)
-        self.row_dropdown.bind("<<ComboboxSelected>>", self.row_selected)
+        self.row_dropdown.set(self.previous_id)
         
         # Add a canvas for the image
         self.image_canvas = tk.Canvas(root, width=300, height=300, bg="gray")
@@ -190,6 +261,8 @@ class HummelApp:
         # Add a button to load the images
         self.load_image_button = tk.Button(root, text="Load Images", command=self.load_images)
         self.load_image_button.grid(row=8, column=2, padx=10, pady=10)
+        # Shift-click scrapes the observation page again instead of using the cache
+        self.load_image_button.bind("<Shift-Button-1>", self.reload_images)
 
         # Frame for image navigation buttons
         self.image_nav_frame = tk.Frame(root)
@@ -202,11 +275,30 @@ class HummelApp:
         self.next_image_button = tk.Button(self.image_nav_frame, text="Next Image >", command=self.next_image)
         self.next_image_button.pack(side="right", padx=5)
 
+        # Thumbnails of all images of the observation
+        self.thumbnail_strip = ThumbnailStrip(root, command=self.thumbnail_clicked)
+        self.thumbnail_strip.grid(row=10, column=2, padx=10, pady=5)
+
     def clear_canvas(self):
         """Clear the image canvas."""
         self.image_canvas.delete("all")
         self.image_canvas.config(bg="gray")  # Reset background color
 
+    def show_canvas_message(self, text):
+        """Show a short text in the middle of the image canvas."""
+        self.clear_canvas()
+        self.image_canvas.create_text(150, 150, text=text, width=280, fill="white", justify="center")
+
+    def show_loading(self):
+        self.show_canvas_message("Loading...")
+
+    def cancel_image_loading(self):
+        """Drop a running image request, e.g. because the user changed the row."""
+        self.worker.cancel("image")
+        self.cancel_thumbnails()
+        self.thumbnail_strip.clear()
+        self.clear_canvas()
+
     def update_image_label(self):
         """Update the label showing the current image index."""
         if self.image_urls:
@@ -214,52 +306,134 @@ class HummelApp:
         else:
             self.image_label.config(text="")
 
-    def load_images(self):
+    def load_images(self, refresh=False):
         """Load images for the current row."""
         # Get the current row and fetch the link
         current_row = data_todo.iloc[self.current_index]
         link = current_row["link"]
+        self.image_urls = []
+        self.update_image_label()
+        self.load_started = time.perf_counter()
 
         if pd.notna(link) and link.strip():
-            # Scrape the image sources
-            self.image_urls = get_image_src(link)
-            if self.image_urls:
-                self.image_index = 0  # Reset index
-                self.display_image(self.image_urls[self.image_index])
-            else:
-                messagebox.showerror("Error", "No images found for the selected link.")
-                self.image_urls = []
-                self.clear_canvas()
+            image_urls = None if refresh else self.prefetcher.ready_urls(link)
+            if image_urls and self.photo_cache.get(image_urls[0], (300, 300)) is not None:
+                # Shown before, e.g. when coming back to the previous row
+                self.worker.cancel("image")
+                self.images_loaded((image_urls, None))
+                return
+            # Scrape the image sources and decode the first image in the background
+            self.show_loading()
+            self.worker.submit(self.fetch_images, link, refresh,
+                               on_done=self.images_loaded, on_error=self.image_failed, key="image")
         else:
-            messagebox.showerror("Error", "No valid link found for this row.")
-            self.image_urls = []
-
-        self.update_image_label()  # Update the image label
+            self.show_canvas_message("No valid link found for this row.")
+
+    def reload_images(self, event=None):
+        """Scrape the current observation page again, bypassing the scrape cache."""
+        self.load_images(refresh=True)
+        return "break"  # Do not run the button's normal command as well
+
+    def fetch_images(self, link, refresh):
+        # Runs on a worker thread
+        if refresh:
+            self.prefetcher.forget(link)
+            image_urls = get_image_src(link, refresh=True, priority=http_client.INTERACTIVE)
+        else:
+            image_urls = self.prefetcher.image_urls(link)
+        return image_urls, self.decode_image(image_urls[0])
+
+    def decode_image(self, image_src):
+        # Runs on a worker thread
+        img_data = self.prefetcher.image_bytes(image_src)
+        return decode_thumbnail(img_data, (300, 300))  # Fit the canvas, keeping the aspect ratio
+
+    def images_loaded(self, result):
+        self.image_urls, img = result
+        self.image_index = 0  # Reset index
+        self.show_image(self.image_urls[0], img)
+        perf.record("time_to_first_image", time.perf_counter() - self.load_started, id=self.row_dropdown.get())
+        self.update_image_label()
+        self.load_thumbnails()
+
+    def load_thumbnails(self):
+        """Fill the thumbnail strip, decoding all missing thumbnails in parallel."""
+        self.cancel_thumbnails()
+        generation = self.thumb_generation
+        self.thumbnail_strip.show_slots(len(self.image_urls))
+        self.thumbnail_strip.select(self.image_index)
+        for index, image_src in enumerate(self.image_urls):
+            photo = self.photo_cache.get(image_src, THUMB_SIZE)
+            if photo is not None:
+                self.thumbnail_strip.set_image(index, photo)
+                continue
+            self.thumb_jobs.append(self.thumb_worker.submit(
+                self.decode_thumbnail, image_src,
+                on_done=lambda img, i=index, src=image_src: self.thumbnail_loaded(generation, i, src, img)))
+
+    def cancel_thumbnails(self):
+        """Cancel the thumbnail jobs that have not started and drop the results of the others."""
+        for future in self.thumb_jobs:
+            future.cancel()
+        self.thumb_jobs = []
+        self.thumb_generation += 1
+
+    def decode_thumbnail(self, image_src):
+        # Runs on a worker thread
+        img_data = self.prefetcher.image_bytes(image_src, priority=http_client.BACKGROUND)
+        return decode_thumbnail(img_data, THUMB_SIZE)
+
+    def thumbnail_loaded(self, generation, index, image_src, img):
+        if generation != self.thumb_generation:
+            return  # The user moved on to another observation
+        photo = ImageTk.PhotoImage(img)
+        self.photo_cache.put(image_src, THUMB_SIZE, photo)
+        self.thumbnail_strip.set_image(index, photo)
+
+    def thumbnail_clicked(self, index):
+        """Open the clicked thumbnail at full canvas size."""
+        if index < len(self.image_urls):
+            self.image_index = index
+            self.display_image(self.image_urls[index])
+            self.thumbnail_strip.select(index)
+            self.update_image_label()
+
+    def image_failed(self, error):
+        print(f"Error displaying image: {error}")
+        if isinstance(error, ScrapeError):
+            self.show_canvas_message(f"No images found for the selected link.\n{error}")
+        else:
+            self.show_canvas_message("Failed to load the image.")
 
     def display_image(self, image_src):
-        try:
-            response = requests.get(image_src, stream=True)
-            response.raise_for_status()
-            img_data = response.content
-
-            # Open the image using Pillow
-            img = Image.open(io.BytesIO(img_data))
-            img = img.resize((300, 300), Image.LANCZOS)  # Resize to fit the canvas
-            img_tk = ImageTk.PhotoImage(img)
-
-            # Clear the canvas and display the image
-            self.clear_canvas()
-            self.image_canvas.create_image(0, 0, anchor="nw", image=img_tk)
-            self.image_canvas.image = img_tk  # Keep a reference to avoid garbage collection
-        except Exception as e:
-            print(f"Error displaying image: {e}")
-            messagebox.showerror("Error", "Failed to load the image.")
-            
+        if self.photo_cache.get(image_src, (300, 300)) is not None:
+            self.worker.cancel("image")
+            self.show_image(image_src)
+            return
+        self.show_loading()
+        self.worker.submit(self.decode_image, image_src,
+                           on_done=lambda img: self.show_image(image_src, img),
+                           on_error=self.image_failed, key="image")
+
+    def show_image(self, image_src, img=None):
+        """Show an image, rendering ``img`` unless it is in the photo cache already."""
+        img_tk = self.photo_cache.get(image_src, (300, 300))
+        if img_tk is None:
+            with perf.timer("render"):
+                img_tk = ImageTk.PhotoImage(img)
+            self.photo_cache.put(image_src, (300, 300), img_tk)
+
+        # Clear the canvas and display the image
+        self.clear_canvas()
+        self.image_canvas.create_image(150, 150, anchor="center", image=img_tk)
+        self.image_canvas.image = img_tk  # Keep a reference to avoid garbage collection
+
     def next_image(self):
         """Show the next image in the list."""
         if self.image_urls and self.image_index < len(self.image_urls) - 1:
             self.image_index += 1
             self.display_image(self.image_urls[self.image_index])
+            self.thumbnail_strip.select(self.image_index)
         self.update_image_label()
 
     def previous_image(self):
@@ -267,9 +441,18 @@ class HummelApp:
         if self.image_urls and self.image_index > 0:
             self.image_index -= 1
             self.display_image(self.image_urls[self.image_index])
+            self.thumbnail_strip.select(self.image_index)
         self.update_image_label()
 
 
+    def prefetch_images(self):
+        """Prefetch the images around the current row and show them if they are ready."""
+        self.image_urls = []
+        self.update_image_label()
+        self.prefetcher.prefetch(self.prefetcher.window(self.links, self.current_index))
+        if self.prefetcher.is_ready(self.links[self.current_index]):
+            self.load_images()
+
     def update_fields(self):
         # Load current row data into fields
         current_row = data_todo.iloc[self.current_index]
@@ -297,13 +480,14 @@ class HummelApp:
 
         # Update the current_index based on the selected ID
         selected_id = int(self.row_dropdown.get())
-        self.current_index = data_todo[data_todo["id"] == selected_id].index[0]
+        self.current_index = todo_index[selected_id]
 
         # After selecting, update the fields to reflect the new data
         self.update_fields()
         
         self.previous_id = selected_id
-        self.clear_canvas()  # Clear the canvas when changing the row
+        self.cancel_image_loading()  # Clear the canvas when changing the row
+        self.prefetch_images()
 
     def previous_row(self):
         # Save changes before moving to the previous row
@@ -312,7 +496,8 @@ class HummelApp:
         if self.current_index > 0:
             self.current_index -= 1
             self.update_fields()
-            self.clear_canvas()  # Clear the canvas when changing the row
+            self.cancel_image_loading()  # Clear the canvas when changing the row
+            self.prefetch_images()
     
     def next_row(self):
         # Save changes before moving to the next row
@@ -321,13 +506,16 @@ class HummelApp:
         if self.current_index < len(data_todo) - 1:
             self.current_index += 1
             self.update_fields()
-            self.clear_canvas()  # Clear the canvas when changing the row
+            self.cancel_image_loading()  # Clear the canvas when changing the row
+            self.prefetch_images()
 
 
     def save_current_row(self):
+        start = time.perf_counter()
         # Get the current row based on the dropdown value
         current_id = int(self.row_dropdown.get())
-        selection = data_todo[data_todo["id"] == current_id].index[0]
+        selection = todo_index[current_id]
+        before = self.row_values(selection)
         # Save changes to the data_todo DataFrame
         data_todo.loc[selection, "man_val"] = self.man_val_dropdown.get()
         data_todo.loc[selection, "best_guess"] = self.best_guess_dropdown.get()
@@ -341,12 +529,20 @@ class HummelApp:
             data_todo.loc[selection, "flower"] = "no"
         else:
             data_todo.loc[selection, "flower"] = "unknown"
-        
+        values = self.row_values(selection)
+        if values != before:
+            # Every navigation saves the row; only edits go to the journal or the database
+            self.journal_row(selection, values)
+            self.row_dropdown.update_row(selection)
+        perf.record("row_save", time.perf_counter() - start, id=current_id)
+        self.count_validated(current_id, before, values)
 
     def save_previous_row(self):
+        start = time.perf_counter()
         # Get the current row based on the dropdown value
         current_id = int(self.previous_id)
-        selection = data_todo[data_todo["id"] == current_id].index[0]
+        selection = todo_index[current_id]
+        before = self.row_values(selection)
         # Save changes to the data_todo DataFrame
         data_todo.loc[selection, "man_val"] = self.man_val_dropdown.get()
         data_todo.loc[selection, "best_guess"] = self.best_guess_dropdown.get()
@@ -360,7 +556,38 @@ class HummelApp:
             data_todo.loc[selection, "flower"] = "no"
         else:
             data_todo.loc[selection, "flower"] = "unknown"
-    
+        values = self.row_values(selection)
+        if values != before:
+            # Every navigation saves the row; only edits go to the journal or the database
+            self.journal_row(selection, values)
+            self.row_dropdown.update_row(selection)
+        perf.record("row_save", time.perf_counter() - start, id=current_id)
+        self.count_validated(current_id, before, values)
+
+    def row_values(self, selection):
+        """Return the edited columns of a row of data_todo."""
+        values = {}
+        for col in edited_columns:
+            value = data_todo.at[selection, col]
+            # Store empty fields the way they come back from an exported CSV
+            values[col] = None if pd.isna(value) or value == "" else value
+        return values
+
+    def journal_row(self, selection, values):
+        """Append the saved values of a row to the edit journal, or update them in the database."""
+        obs_id = int(data_todo.at[selection, "id"])
+        if store is not None:
+            store.update(obs_id, values)
+        elif journal is not None:
+            journal.append(obs_id, values)
+
+    def count_validated(self, obs_id, before, values):
+        """Count a saved row for the performance report if the user set its validator."""
+        # Every navigation saves the row and fills defaults such as the flower field on the first
+        # visit, so only a validator entered in this save marks the row as validated
+        if values["validator"] is not None and values["validator"] != before["validator"]:
+            perf.validated(obs_id)
+
     def open_link(self):
         # Open the link in the default web browser
         current_row = data_todo.iloc[self.current_index]
@@ -375,6 +602,7 @@ class HummelApp:
         current_row = data_todo.iloc[self.current_index]
         link = current_row["link"]
         if pd.notna(link) and link.strip():
+            import pyperclip  # Only needed here, not worth importing at start-up
             pyperclip.copy(link)
         else:
             messagebox.showerror("Error", "No valid link found for this row.")
@@ -383,15 +611,9 @@ class HummelApp:
     def submit_data(self):
         # Save current row data
         self.save_current_row()
-        for index, row in data_todo.iterrows():
-            current_id = row["id"]
-            selection = data_all[data_all["id"] == current_id].index[0]
-            data_all.loc[selection, "validator"] = row["validator"]
-            data_all.loc[selection, "man_val"] = row["man_val"]
-            data_all.loc[selection, "best_guess"] = row["best_guess"]
-            data_all.loc[selection, "food_plant"] = row["food_plant"]
-            data_all.loc[selection, "gender"] = row["gender"]
-            data_all.loc[selection, "flower"] = row["flower"]
+        if store is None:
+            with perf.timer("write_back", rows=len(data_todo)):
+                write_back(data_all, data_todo, edited_columns, all_index)
 
         # File save dialog
         default_dir = os.path.dirname(data_file_path)
@@ -404,10 +626,30 @@ class HummelApp:
         )
 
         if file_path:
-            data_all.to_csv(file_path, sep=";", index=False)
+            with perf.timer("file_save"):
+                if store is not None:
+                    store.export_csv(file_path, sep=";")
+                else:
+                    data_all.to_csv(file_path, sep=";", index=False)
+            if journal is not None:
+                journal.sync()
+                if os.path.abspath(file_path) == os.path.abspath(data_file_path):
+                    # The data file now contains every journaled edit
+                    journal.clear()
             messagebox.showinfo("Success", f"Data submitted successfully! File saved as {file_path}")
 
 # Run the app
-root = tk.Tk()
+progress.step("Building the window...")
+progress.close()
 app = HummelApp(root)
+finished(root)
+app.prefetch_images()
 root.mainloop()
+app.worker.shutdown()
+app.thumb_worker.shutdown()
+app.prefetcher.shutdown()
+if journal is not None:
+    journal.close()
+if store is not None:
+    store.close()
+perf.report(http_client.stats.snapshot(), http_client.limiter.status())
@@ -1,5 +1,16 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# Packages that are installed in the build environment or reached through
+# optional imports of pandas, numpy and Pillow, but never used by the app.
+# Leaving them out makes the bundle smaller and faster to unpack and scan.
+excludes = [
+    "bs4", "soupsieve", "lxml", "html5lib",  # Page parsing uses html.parser
+    "matplotlib", "scipy", "IPython", "jinja2", "sqlalchemy", "pytest", "sphinx", "docutils",
+    "openpyxl", "xlrd", "xlsxwriter", "odf", "pyxlsb", "python_calamine", "tables", "numba", "fsspec",
+    "PyQt5", "PyQt6", "PySide2", "PySide6",
+    "setuptools", "pip", "wheel", "pydoc_data", "lib2to3", "tkinter.test", "idlelib",
+]
+
 
 a = Analysis(
     ['hummelbestimmung_GUI.py'],
@@ -10,7 +21,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     noarchive=False,
     optimize=0,
 )
@@ -0,0 +1,34 @@
+import os
+
+from image_cache import ImageCache
+from scrape_cache import ScrapeCache
+
+
+class ImageArchive():
+    """Offline copy of the scraped pages and images of a work list.
+
+    An archive is a directory holding a ScrapeCache without expiry
+    (``pages.sqlite``) and an ImageCache without size limit (``images/``).
+    It is built by prefetch_archive.py and opened by the GUIs with --archive.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.pages = ScrapeCache(os.path.join(directory, "pages.sqlite"), ttl=None)
+        self.images = ImageCache(os.path.join(directory, "images"), max_bytes=None)
+
+    def image_urls(self, link):
+        return self.pages.get(link)
+
+    def image(self, url):
+        return self.images.get(url)
+
+    def is_complete(self, link):
+        """Return True if the page and every image of ``link`` are in the archive."""
+        image_urls = self.pages.get(link)
+        return image_urls is not None and all(self.images.contains(url) for url in image_urls)
+
+    def close(self):
+        self.pages.close()
+        self.images.close()
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_MAX_BYTES = int(os.environ.get("HUMMEL_IMAGE_CACHE_BYTES", 500 * 1024 * 1024))
+
+
+def default_cache_dir():
+    """Return the directory holding the local caches, shared by both GUIs."""
+    return os.environ.get("HUMMEL_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".hummel_cache"))
+
+
+class ImageCache():
+    """Persistent on-disk cache for downloaded images.
+
+    Entries are keyed by URL, but the bytes are stored by content hash, so the
+    same photo reached through two URLs is only kept once. The index lives in a
+    small SQLite database, which lets several app instances on one machine share
+    the cache. Once the stored size exceeds ``max_bytes`` the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.path.join(default_cache_dir(), "images")
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=30, check_same_thread=False)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "url TEXT PRIMARY KEY, digest TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    def blob_path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def contains(self, url):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM entries WHERE url = ?", (url,)).fetchone() is not None
+
+    def get(self, url):
+        """Return the cached bytes for ``url`` or None."""
+        with self.lock:
+            row = self.db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            try:
+                with open(self.blob_path(row[0]), "rb") as f:
+                    data = f.read()
+            except OSError:
+                # The blob was evicted by another instance or removed by hand
+                with self.db:
+                    self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                return None
+            with self.db:
+                self.db.execute("UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url))
+            return data
+
+    def put(self, url, data):
+        """Store ``data`` for ``url`` and evict old entries if the cache is full."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        with self.lock:
+            if not os.path.exists(path):
+                self._write_atomic(path, data)
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO entries (url, digest, size, last_used) VALUES (?, ?, ?, ?)",
+                    (url, digest, len(data), time.time()),
+                )
+            self._evict()
+
+    def _write_atomic(self, path, data):
+        # Write to a temporary file in the same directory and rename it, so a
+        # crash never leaves a truncated image behind under its final name
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def size(self):
+        """Return the number of bytes currently stored."""
+        with self.lock:
+            return self._stored_bytes()
+
+    def _stored_bytes(self):
+        row = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)").fetchone()
+        return row[0]
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        total = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT url, digest, size FROM entries ORDER BY last_used").fetchall()
+        with self.db:
+            for url, digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                still_used = self.db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+                if still_used is None:
+                    total -= size
+                    try:
+                        os.remove(self.blob_path(digest))
+                    except OSError:
+                        pass
+
+    def clear(self):
+        """Remove every cached image."""
+        with self.lock:
+            digests = [row[0] for row in self.db.execute("SELECT DISTINCT digest FROM entries")]
+            with self.db:
+                self.db.execute("DELETE FROM entries")
+            for digest in digests:
+                try:
+                    os.remove(self.blob_path(digest))
+                except OSError:
+                    pass
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,32 @@
+import io
+
+from PIL import Image, ImageOps
+
+import perf
+from observation_bundle import MemoryReader
+
+# EXIF orientations that rotate the picture by 90 or 270 degrees
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def decode_thumbnail(img_data, size):
+    """Decode image bytes into an upright thumbnail that fits into ``size``.
+
+    For JPEGs, ``draft`` makes the decoder scale by 1/2, 1/4 or 1/8 while
+    decoding, so a 12 MP photo is never held in memory at full resolution.
+    The EXIF orientation is applied and the aspect ratio is kept.
+    ``img_data`` may be bytes or a memoryview into a mapped bundle, which is
+    read in place.
+    """
+    with perf.timer("decode", size=size[0]):
+        if isinstance(img_data, memoryview):
+            img = Image.open(io.BufferedReader(MemoryReader(img_data)))
+        else:
+            img = Image.open(io.BytesIO(img_data))
+        width, height = size
+        if img.getexif().get(ImageOps.ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width  # The picture is rotated after decoding
+        img.draft("RGB", (width, height))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(size, Image.LANCZOS)
+    return img
@@ -0,0 +1,144 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+from rate_limiter import INTERACTIVE
+
+
+def failed(future):
+    """Return True if ``future`` finished without a usable result."""
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+class ImagePrefetcher():
+    """Scrape and download the images of upcoming observations in the background.
+
+    ``get_urls(link)`` must return the list of image URLs of an observation page
+    and ``get_bytes(url)`` the raw bytes of one image. Both are run on a bounded
+    worker pool, so the Tk main thread only has to pick up finished results.
+
+    Both also take a ``priority`` keyword: prefetch jobs run with the default
+    (background) priority, while a job the user is waiting for that has not
+    started yet is run right away with INTERACTIVE priority instead. A job that
+    failed is run again the same way, so one transient error does not stick.
+    """
+
+    def __init__(self, get_urls, get_bytes, max_workers=4, lookahead=3):
+        self.get_urls = get_urls
+        self.get_bytes = get_bytes
+        self.lookahead = lookahead
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.url_jobs = {}    # link -> Future[list of image URLs]
+        self.image_jobs = {}  # image URL -> Future[bytes]
+        self.lock = threading.Lock()
+
+    def window(self, links, index):
+        """Return the links worth prefetching around position ``index``."""
+        first = max(index - 1, 0)
+        last = min(index + self.lookahead, len(links) - 1)
+        return [links[i] for i in range(first, last + 1)]
+
+    def prefetch(self, links):
+        """Start jobs for ``links`` and drop the jobs of every other observation."""
+        wanted = [link for link in links if isinstance(link, str) and link.strip()]
+        for link in list(self.url_jobs):
+            if link not in wanted:
+                self.forget(link)
+        for link in wanted:
+            if link not in self.url_jobs:
+                future = self.executor.submit(self.get_urls, link)
+                self.url_jobs[link] = future
+                future.add_done_callback(partial(self._queue_images, link))
+
+    def _queue_images(self, link, future):
+        # Runs on a worker thread once the observation page has been scraped
+        if self.url_jobs.get(link) is not future:
+            return
+        if future.cancelled() or future.exception() is not None:
+            return
+        image_urls = future.result()
+        if isinstance(image_urls, list):
+            for url in image_urls:
+                self.image_future(url)
+
+    def image_future(self, url):
+        """Return the download job for ``url``, starting it if necessary."""
+        with self.lock:
+            future = self.image_jobs.get(url)
+            if future is None:
+                future = self.executor.submit(self.get_bytes, url)
+                self.image_jobs[url] = future
+            return future
+
+    def image_urls(self, link):
+        """Return the image URLs of ``link``, waiting for a running scrape."""
+        future = self.url_jobs.get(link)
+        if future is None or failed(future) or future.cancel():
+            # Not started yet or failed: scrape it on this thread, ahead of the prefetch jobs,
+            # and keep the result so ready_urls and prefetch see it
+            future = Future()
+            self.url_jobs[link] = future
+            try:
+                future.set_result(self.get_urls(link, priority=INTERACTIVE))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def ready_urls(self, link):
+        """Return the image URLs of ``link`` if they are already known, otherwise None."""
+        future = self.url_jobs.get(link)
+        if future is None or not future.done() or future.cancelled() or future.exception() is not None:
+            return None
+        image_urls = future.result()
+        return image_urls if isinstance(image_urls, list) and image_urls else None
+
+    def is_ready(self, link):
+        """Return True if the page and the first image of ``link`` are already downloaded."""
+        image_urls = self.ready_urls(link)
+        if image_urls is None:
+            return False
+        first = self.image_jobs.get(image_urls[0])
+        return first is not None and first.done() and not first.cancelled()
+
+    def image_bytes(self, url, priority=INTERACTIVE):
+        """Return the bytes of ``url``, waiting for a running download.
+
+        With INTERACTIVE priority a download that has not started is taken
+        over and run on the calling thread. Thumbnails pass BACKGROUND: they
+        wait for a queued prefetch job instead, and download on the calling
+        thread only if there is none, so they do not compete with the image
+        the user is waiting for.
+        """
+        with self.lock:
+            future = self.image_jobs.get(url)
+            if future is not None and not failed(future) and (priority != INTERACTIVE or not future.cancel()):
+                run_here = False
+            else:
+                # Not started yet or failed: download it on this thread
+                future = Future()
+                self.image_jobs[url] = future
+                run_here = True
+        if run_here:
+            try:
+                future.set_result(self.get_bytes(url, priority=priority))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def forget(self, link):
+        """Cancel and discard everything prefetched for ``link``."""
+        future = self.url_jobs.pop(link, None)
+        if future is None:
+            return
+        future.cancel()
+        if future.done() and not future.cancelled() and future.exception() is None:
+            image_urls = future.result()
+            if isinstance(image_urls, list):
+                with self.lock:
+                    for url in image_urls:
+                        job = self.image_jobs.pop(url, None)
+                        if job is not None:
+                            job.cancel()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,167 @@
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+STATUS_FILTERS = ["all", "unvalidated", "done", "flagged"]
+
+
+class ObservationBrowser():
+    """Scrollable list of observations that only renders the visible rows.
+
+    The Listbox never holds more than ``visible_rows`` entries; scrolling
+    replaces them with the rows of the new window, so building and scrolling
+    the list costs the same for 100 and for 100 000 observations.
+
+    ``statuses()`` must return the status ("unvalidated", "done" or "flagged")
+    of every row, ``status_of(position)`` the status of one row and
+    ``label_of(position)`` the text shown for one row.
+    ``id_index`` maps observation ids to row positions for jumping to an id.
+    ``command(event)`` is called when the user selects another observation.
+    """
+
+    def __init__(self, parent, ids, id_index, statuses, status_of, label_of, command=None, visible_rows=6):
+        self.ids = ids
+        self.id_index = id_index
+        self.statuses = statuses
+        self.status_of = status_of
+        self.label_of = label_of
+        self.command = command
+        self.visible_rows = visible_rows
+        self.current_id = None
+        self.top = 0
+        self.status_cache = self.statuses()
+        self.rows = range(len(self.ids))  # Row positions matching the status filter
+
+        self.frame = tk.Frame(parent)
+
+        # Entry to jump to an observation id
+        self.entry = tk.Entry(self.frame, width=14)
+        self.entry.grid(row=0, column=0, sticky="w")
+        self.entry.bind("<Return>", self.jump_to_entry)
+
+        # Status filter
+        self.status_dropdown = ttk.Combobox(self.frame, values=STATUS_FILTERS, state="readonly", width=11)
+        self.status_dropdown.current(0)
+        self.status_dropdown.grid(row=0, column=1, columnspan=2, sticky="e")
+        self.status_dropdown.bind("<<ComboboxSelected>>", self.apply_filter)
+
+        # Window onto the filtered rows and its scrollbar
+        self.listbox = tk.Listbox(self.frame, height=visible_rows, width=36, exportselection=False, font="TkFixedFont")
+        self.listbox.grid(row=1, column=0, columnspan=2, sticky="nsew")
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_to(self.top - 1))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_to(self.top + 1))
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.on_scroll)
+        self.scrollbar.grid(row=1, column=2, sticky="ns")
+        self.render()
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def get(self):
+        """Return the id of the current observation as text, like ttk.Combobox.get()."""
+        return "" if self.current_id is None else str(self.current_id)
+
+    def set(self, obs_id):
+        """Make ``obs_id`` the current observation and scroll it into view."""
+        self.current_id = obs_id
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, str(obs_id))
+        position = self.id_index.get(obs_id)
+        if position is not None:
+            # Row positions are sorted, so the filtered row can be found by bisection
+            row = self._find_row(position)
+            if row is not None and not self.top <= row < self.top + self.visible_rows:
+                self.top = row - self.visible_rows // 2
+        self.render()
+
+    def _find_row(self, position):
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self.rows[middle] < position:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.rows) and self.rows[low] == position:
+            return low
+        return None
+
+    def update_row(self, position):
+        """Re-read the status of the row at ``position``, e.g. after it was saved."""
+        status = self.status_of(position)
+        self.status_cache[position] = status
+        if not isinstance(self.rows, range):
+            # A status filter is active: add or drop the row to keep the filtered rows in step
+            wanted = status == self.status_dropdown.get()
+            row = self._find_row(position)
+            if wanted and row is None:
+                bisect.insort(self.rows, position)
+            elif not wanted and row is not None:
+                del self.rows[row]
+        self.render()
+
+    def apply_filter(self, event=None):
+        status = self.status_dropdown.get()
+        self.status_cache = self.statuses()
+        if status == "all":
+            self.rows = range(len(self.ids))
+        else:
+            self.rows = [position for position, row_status in enumerate(self.status_cache) if row_status == status]
+        self.top = 0
+        self.set(self.current_id)
+
+    def render(self):
+        """Fill the listbox with the rows of the current window."""
+        self.top = max(0, min(self.top, len(self.rows) - self.visible_rows))
+        window = self.rows[self.top:self.top + self.visible_rows]
+        self.listbox.delete(0, tk.END)
+        for offset, position in enumerate(window):
+            obs_id = self.ids[position]
+            label = self.label_of(position)
+            self.listbox.insert(tk.END, f"{obs_id:<10} {self.status_cache[position]:<11} {label}")
+            if obs_id == self.current_id:
+                self.listbox.selection_set(offset)
+        if len(self.rows):
+            self.scrollbar.set(self.top / len(self.rows), min(1.0, (self.top + self.visible_rows) / len(self.rows)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, top):
+        self.top = top
+        self.render()
+
+    def on_scroll(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def on_mousewheel(self, event):
+        self.scroll_to(self.top - (1 if event.delta > 0 else -1))
+        return "break"
+
+    def on_select(self, event):
+        selected = self.listbox.curselection()
+        if not selected:
+            return
+        position = self.rows[self.top + selected[0]]
+        self.select(self.ids[position])
+
+    def jump_to_entry(self, event=None):
+        text = self.entry.get().strip()
+        obs_id = int(text) if text.isdigit() else text
+        if obs_id not in self.id_index:
+            self.entry.config(bg="misty rose")
+            self.entry.after(800, lambda: self.entry.config(bg="white"))
+            return
+        self.select(obs_id)
+
+    def select(self, obs_id):
+        if obs_id == self.current_id:
+            return
+        self.set(obs_id)
+        if self.command is not None:
+            self.command(None)
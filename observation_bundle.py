@@ -0,0 +1,196 @@
+"""Pack a work list and all its images into one memory-mapped bundle file.
+
+A bundle is a single file that can be copied to a validator laptop instead of
+an archive directory with thousands of loose images:
+
+    magic (8 bytes) | image bytes ... | index (JSON) | index offset, index length (2 x uint64) | magic
+
+The index maps every observation id to its link and to the offset and length
+of each of its images, and holds the metadata rows of the work list as CSV.
+The reader memory-maps the file, so an image is handed to the decoder as a
+memoryview into the mapping without reading or copying it first.
+
+Build a bundle from an export, fetching missing images into an archive first:
+
+    python observation_bundle.py export.csv --app hummel --archive archive --out hummel.bundle
+
+and open it in a GUI with --bundle hummel.bundle.
+"""
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"HUMBNDL1"
+FOOTER = struct.Struct("<QQ")
+VERSION = 1
+
+
+class BundleError(Exception):
+    """Raised when a file is not a readable observation bundle."""
+
+
+class MemoryReader(io.RawIOBase):
+    """Seekable read-only file object over a memoryview, for Image.open."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self.buffer[self.position:self.position + len(b)]
+        b[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.buffer)
+        self.position = max(0, offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class ObservationBundle():
+    """Read-only view of a bundle file, usable wherever an ImageArchive is.
+
+    ``image_urls(link)`` and ``image(url)`` return None for observations that
+    are not in the bundle, so the caller falls back to the caches and the
+    network. ``image`` returns a memoryview into the mapped file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise BundleError(f"{path} is empty") from e
+        self.view = memoryview(self.map)
+        end = len(self.view) - len(MAGIC)
+        if len(self.view) < 2 * len(MAGIC) + FOOTER.size or self.view[:len(MAGIC)] != MAGIC or self.view[end:] != MAGIC:
+            raise BundleError(f"{path} is not an observation bundle")
+        index_offset, index_length = FOOTER.unpack(self.view[end - FOOTER.size:end])
+        index = json.loads(bytes(self.view[index_offset:index_offset + index_length]))
+        if index.get("version") != VERSION:
+            raise BundleError(f"{path} has unsupported bundle version {index.get('version')}")
+        self.rows_csv = index["rows"]
+        self.ids = {}  # observation id -> link
+        self.links = {}  # link -> image URLs
+        self.images = {}  # image URL -> (offset, length)
+        for obs_id, link, images in index["observations"]:
+            self.ids[obs_id] = link
+            self.links[link] = [url for url, offset, length in images]
+            for url, offset, length in images:
+                self.images[url] = (offset, length)
+
+    def image_urls(self, link):
+        return self.links.get(link)
+
+    def image(self, url):
+        location = self.images.get(url)
+        if location is None:
+            return None
+        offset, length = location
+        return self.view[offset:offset + length]
+
+    def rows(self):
+        """Return the metadata rows of the work list as a DataFrame."""
+        import pandas as pd  # Only needed here, keeps opening a bundle cheap
+        return pd.read_csv(io.StringIO(self.rows_csv), dtype=str, keep_default_na=False)
+
+    def close(self):
+        # Memoryviews handed out for images keep the mapping alive, so only
+        # close it if nobody holds one any more
+        try:
+            self.view.release()
+            self.map.close()
+        except BufferError:
+            pass
+
+
+def write_bundle(path, rows, observations):
+    """Write a bundle to ``path``.
+
+    ``rows`` is the DataFrame of the work list and ``observations`` yields
+    ``(obs_id, link, [(url, image_bytes), ...])`` for every observation to
+    include. Images are streamed to disk, so the bundle never has to fit into
+    memory. The file is written under a temporary name and renamed at the end.
+    """
+    tmp_path = path + ".tmp"
+    index = {"version": VERSION, "rows": rows.to_csv(index=False), "observations": []}
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        for obs_id, link, images in observations:
+            entries = []
+            for url, img_data in images:
+                entries.append([url, f.tell(), len(img_data)])
+                f.write(img_data)
+            index["observations"].append([obs_id, link, entries])
+        index_offset = f.tell()
+        index_data = json.dumps(index).encode("utf-8")
+        f.write(index_data)
+        f.write(FOOTER.pack(index_offset, len(index_data)))
+        f.write(MAGIC)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(index["observations"])
+
+
+def archived_observations(archive, data_todo):
+    """Yield the observations of ``data_todo`` that are complete in ``archive``."""
+    skipped = 0
+    for obs_id, link in zip(data_todo["id"].tolist(), data_todo["link"].tolist()):
+        if not isinstance(link, str) or not archive.is_complete(link):
+            skipped += 1
+            continue
+        image_urls = archive.image_urls(link)
+        yield int(obs_id), link, [(url, archive.image(url)) for url in image_urls]
+    if skipped:
+        print(f"{skipped} observations without archived images were left out", file=sys.stderr)
+
+
+def main():
+    from image_archive import ImageArchive
+    from observation_data import WORK_LISTS
+    from prefetch_archive import build_archive, select_links
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_file", help="observation export (CSV)")
+    parser.add_argument("--app", choices=sorted(WORK_LISTS), default="hummel",
+                        help="select the observations of this app (default: hummel)")
+    parser.add_argument("--archive", required=True, help="archive directory holding or receiving the images")
+    parser.add_argument("--out", required=True, help="bundle file to write")
+    parser.add_argument("--workers", type=int, default=4, help="observations fetched in parallel (default: 4)")
+    parser.add_argument("--offline", action="store_true", help="only pack what is already in the archive")
+    args = parser.parse_args()
+
+    data_todo, links = select_links(args.data_file, args.app)
+    archive = ImageArchive(args.archive)
+    try:
+        if not args.offline:
+            build_archive(archive, links, args.workers)
+        count = write_bundle(args.out, data_todo, archived_observations(archive, data_todo))
+    except KeyboardInterrupt:
+        return
+    finally:
+        archive.close()
+    print(f"Wrote {count} observations to {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import codecs
+import csv
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # The sidecar cache is optional
+    pa = None
+
+# ------Shared helpers for the observation tables------
+
+SAMPLE_BYTES = 64 * 1024
+ENCODINGS = ['utf-8', 'cp1252', 'latin1']
+SEPARATORS = [',', ';']
+
+# Free text columns are read as object so that entered names can be stored in them
+TEXT_COLUMNS = [
+    "link", "landuse", "validator.name", "validator", "man_val", "best_guess",
+    "food_plant", "gender", "flower", "flower_validator", "comment_flower",
+]
+COLUMN_DTYPES = {"id": "Int64", **{col: object for col in TEXT_COLUMNS}}
+
+# Repetitive columns stored dictionary encoded in the sidecar. Only the ones
+# that are never edited stay categorical after loading.
+CATEGORY_COLUMNS = ["landuse", "validator.name", "validator"]
+READONLY_CATEGORY_COLUMNS = ["landuse", "validator.name"]
+SIDECAR_KEY = b"bumblebee_id_source"
+HASH_CHUNK = 1024 * 1024
+
+
+def dialect_path(filepath):
+    return f"{filepath}.dialect.json"
+
+
+def file_signature(filepath):
+    stat = os.stat(filepath)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def sniff_encoding(sample):
+    """Return the first encoding in ENCODINGS that can decode ``sample``."""
+    for encoding in ENCODINGS:
+        try:
+            # final=False tolerates a multi-byte character cut off at the end of the sample
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+def sniff_separator(text):
+    """Return the separator that splits the sample into the most consistent columns."""
+    lines = text.splitlines()
+    if len(lines) > 1:
+        lines = lines[:-1]  # The last line of the sample may be cut off
+    best, best_width = SEPARATORS[0], 1
+    for sep in SEPARATORS:
+        rows = list(csv.reader(lines, delimiter=sep))
+        if not rows:
+            continue
+        width = len(rows[0])
+        consistent = sum(1 for row in rows if len(row) == width) / len(rows)
+        if width > best_width and consistent >= 0.9:
+            best, best_width = sep, width
+    return best
+
+
+def sniff_dialect(filepath):
+    """Detect encoding, separator and header of a CSV file from its first bytes."""
+    with open(filepath, "rb") as f:
+        sample = f.read(SAMPLE_BYTES)
+    encoding = sniff_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(sample, final=False)
+    if text.startswith("\ufeff"):
+        text = text[1:]
+        encoding = "utf-8-sig"
+    sep = sniff_separator(text)
+    header = next(csv.reader([text.splitlines()[0] if text else ""], delimiter=sep), [])
+    return {"encoding": encoding, "sep": sep, "columns": header}
+
+
+def load_dialect(filepath):
+    """Return the dialect detected on an earlier load if the file did not change since."""
+    try:
+        with open(dialect_path(filepath), encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if saved.get("signature") != file_signature(filepath):
+        return None
+    return saved["dialect"]
+
+
+def save_dialect(filepath, dialect):
+    try:
+        with open(dialect_path(filepath), "w", encoding="utf-8") as f:
+            json.dump({"signature": file_signature(filepath), "dialect": dialect}, f)
+    except OSError:
+        pass  # Read-only directory, sniff again next time
+
+
+def read_csv_flexible(filepath):
+    """Read an observation export, detecting its encoding and separator from a sample.
+
+    The file is parsed once, with explicit dtypes for the known columns and
+    with every other column typed from all of its values (low_memory=False),
+    so a column that turns from numbers to text further down the file holds
+    only strings instead of a mix of both. The detected dialect is printed
+    and stored next to the file so the next load can skip the sniffing.
+    """
+    dialect = load_dialect(filepath) or sniff_dialect(filepath)
+    dtype = {col: COLUMN_DTYPES[col] for col in dialect["columns"] if col in COLUMN_DTYPES}
+    # The sample decoded fine, but a later part of the file may still need another encoding
+    candidates = [dialect["encoding"]] + [enc for enc in ENCODINGS if enc != dialect["encoding"]]
+    for encoding in candidates:
+        try:
+            df = pd.read_csv(filepath, sep=dialect["sep"], encoding=encoding, dtype=dtype,
+                             low_memory=False)
+        except UnicodeDecodeError:
+            continue
+        except Exception as e:
+            raise ValueError(f"Failed to read file '{filepath}': {e}") from e
+        dialect["encoding"] = encoding
+        print(f"Read '{filepath}' with encoding={encoding}, separator='{dialect['sep']}'")
+        save_dialect(filepath, dialect)
+        return df
+    raise ValueError(f"Failed to read file '{filepath}' with common encodings and separators.")
+
+
+def build_id_index(frame, column="id"):
+    """Map every observation id to the index label of its first row in ``frame``.
+
+    A dict lookup replaces ``frame[frame["id"] == id].index[0]``, which scans the
+    whole column on every call.
+    """
+    index = {}
+    for label, obs_id in zip(frame.index.tolist(), frame[column].tolist()):
+        index.setdefault(obs_id, label)
+    return index
+
+
+def ensure_object_columns(frame, columns):
+    """Convert ``columns`` to object dtype so that they can hold the entered names.
+
+    Columns that are empty in the file are parsed as float and would reject strings.
+    """
+    for col in columns:
+        if frame[col].dtype != object:
+            frame[col] = frame[col].astype(object)
+
+
+def write_back(target, source, columns, id_index, column="id"):
+    """Copy ``columns`` of every row of ``source`` onto the row with the same id in ``target``.
+
+    ``id_index`` maps the ids to the index labels of ``target`` (see
+    build_id_index). All rows are written with a single index-aligned
+    assignment instead of one lookup and one ``.loc`` write per row and column.
+    """
+    labels = [id_index[obs_id] for obs_id in source[column].tolist()]
+    ensure_object_columns(target, columns)
+    target.loc[labels, columns] = source[columns].to_numpy(dtype=object)
+
+
+def apply_edits(target, edits, id_index):
+    """Apply journaled ``edits`` ({id: {column: value}}) to ``target``.
+
+    Returns the number of observations that were found and updated.
+    """
+    columns = {col for values in edits.values() for col in values}
+    ensure_object_columns(target, [col for col in columns if col in target.columns])
+    applied = 0
+    for obs_id, values in edits.items():
+        label = id_index.get(obs_id)
+        if label is None:
+            continue
+        for col, value in values.items():
+            if col in target.columns:
+                target.at[label, col] = value
+        applied += 1
+    return applied
+
+
+def sidecar_path(filepath):
+    return f"{filepath}.parquet"
+
+
+def source_key(filepath):
+    """Identify the content of a data file by size, mtime and a hash of its head and tail.
+
+    Hashing only the first and last MiB keeps the check fast for large exports.
+    """
+    signature = file_signature(filepath)
+    digest = hashlib.blake2b(str(signature["size"]).encode())
+    with open(filepath, "rb") as f:
+        digest.update(f.read(HASH_CHUNK))
+        if signature["size"] > HASH_CHUNK:
+            f.seek(max(signature["size"] - HASH_CHUNK, HASH_CHUNK))
+            digest.update(f.read())
+    return json.dumps({**signature, "hash": digest.hexdigest()})
+
+
+def read_sidecar(filepath, key):
+    """Return the frame cached for ``filepath`` or None if there is no valid sidecar."""
+    path = sidecar_path(filepath)
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        if metadata.get(SIDECAR_KEY) != key.encode():
+            return None
+        df = pq.read_table(path).to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+    # Restore the dtypes read_csv_flexible uses for the text and edited columns
+    ensure_object_columns(df, [col for col in TEXT_COLUMNS
+                               if col in df.columns and col not in READONLY_CATEGORY_COLUMNS])
+    return df
+
+
+def write_sidecar(filepath, key, df):
+    """Store ``df`` as Parquet next to ``filepath``, tagged with the source ``key``."""
+    if pa is None:
+        return
+    encoded = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in encoded.columns:
+            encoded[col] = encoded[col].astype("category")
+    for col in encoded.columns:
+        # Parquet needs one type per column; a column mixing numbers and text is stored as text,
+        # which is also how it is written back to CSV
+        if encoded[col].dtype == object and pd.api.types.infer_dtype(encoded[col], skipna=True).startswith("mixed"):
+            notna = encoded[col].notna()
+            encoded.loc[notna, col] = encoded.loc[notna, col].astype(str)
+    path = sidecar_path(filepath)
+    try:
+        table = pa.Table.from_pandas(encoded, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), SIDECAR_KEY: key.encode()})
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        os.close(fd)
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    except (OSError, pa.ArrowException) as e:
+        print(f"Could not write the sidecar cache '{path}': {e}")
+
+
+def load_observations(filepath):
+    """Read a data file, reusing the Parquet sidecar from an earlier load when it is still valid."""
+    key = source_key(filepath)
+    df = read_sidecar(filepath, key)
+    if df is not None:
+        print(f"Read '{filepath}' from the sidecar cache")
+        return df
+    df = read_csv_flexible(filepath)
+    for col in READONLY_CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    write_sidecar(filepath, key, df)
+    return df
+
+
+# ------Work lists of the two apps------
+
+HUMMEL_REQUIRED_COLUMNS = ["man_val", "best_guess", "food_plant", "gender", "validator", "flower"]
+FLOWER_REQUIRED_COLUMNS = HUMMEL_REQUIRED_COLUMNS + ["flower_validator", "comment_flower"]
+
+
+def add_missing_columns(data_all, columns):
+    """Ensure necessary columns exist."""
+    for col in columns:
+        if col not in data_all.columns:
+            data_all[col] = None
+
+
+def hummel_todo(data_all):
+    """Return the observations still to be validated in the bumblebee app."""
+    data_todo = data_all[
+        (data_all["validator.name"].isna() | (data_all["validator.name"] == "Photo recognition api") | (data_all["validator.name"] == "Automatic validation"))
+        & (data_all["landuse"] == "AX_Landwirtschaft") & (data_all["validator"].isna() | (data_all["validator"].isin(["LK", "Test"])))
+    ]
+    return data_todo.reset_index(drop=True)
+
+
+def flower_todo(data_all):
+    """Return the observations still to be validated in the flower app."""
+    data_todo = data_all[
+        (((data_all["validator.name"].notna()) & (data_all["validator.name"] != "Photo recognition api") & (data_all["validator.name"] != "Automatic validation")) | (data_all["validator"].isin(["SO", "JM"])))
+        & (data_all["landuse"] == "AX_Landwirtschaft")
+        & (data_all["flower_validator"].isna() | (data_all["flower_validator"].isin(["LK", "Test"])))
+        & (data_all["flower"] != "no")
+    ]
+    return data_todo.reset_index(drop=True)
+
+
+WORK_LISTS = {
+    "hummel": (HUMMEL_REQUIRED_COLUMNS, hummel_todo),
+    "flower": (FLOWER_REQUIRED_COLUMNS, flower_todo),
+}
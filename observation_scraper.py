@@ -0,0 +1,126 @@
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+
+import http_client
+import perf
+from image_archive import ImageArchive
+from image_cache import ImageCache
+from observation_bundle import ObservationBundle
+from scrape_cache import ScrapeCache
+
+# Class of the observation photos in the gallery of an observation page
+GALLERY_IMAGE_CLASS = "app-ratio-box-image"
+
+
+class ScrapeError(Exception):
+    """Raised when the image URLs of an observation page cannot be determined."""
+
+
+class GalleryParser(HTMLParser):
+    """Collect the src of every gallery image of a page, without building a tree."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sources = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "img":
+            attrs = dict(attrs)
+            if GALLERY_IMAGE_CLASS in (attrs.get("class") or "").split() and attrs.get("src"):
+                self.sources.append(attrs["src"])
+
+
+def extract_image_sources(html):
+    """Return the src attributes of the gallery images in ``html``.
+
+    Finds the same images as searching a BeautifulSoup tree for them, in
+    document order, so dropping the last one still drops the page preview.
+    The whole page is read: where the preview sits relative to the footer is
+    not something the scraper can rely on.
+    """
+    parser = GalleryParser()
+    parser.feed(html)
+    parser.close()
+    return parser.sources
+
+
+# Cache of already scraped observation pages
+scrape_cache = ScrapeCache()
+
+# Local cache of downloaded images, shared between sessions and app instances
+image_cache = ImageCache()
+
+# Offline archives and bundles, consulted before the caches and the network
+archives = []
+
+
+def open_archive(directory):
+    """Serve pages and images from the archive in ``directory`` from now on."""
+    archive = ImageArchive(directory)
+    archives.append(archive)
+    return archive
+
+
+def open_bundle(path):
+    """Serve pages and images from the memory-mapped bundle at ``path`` from now on."""
+    bundle = ObservationBundle(path)
+    archives.append(bundle)
+    return bundle
+
+
+# Scrape the image URLs of an observation page
+def get_image_src(url, refresh=False, priority=http_client.BACKGROUND):
+    if not refresh:
+        for archive in archives:
+            archived = archive.image_urls(url)
+            if archived is not None:
+                perf.count("scrape.archive_hit")
+                return archived
+        cached = scrape_cache.get(url)
+        if cached is not None:
+            perf.count("scrape.cache_hit")
+            return cached
+    perf.count("scrape.miss")
+    with perf.timer("scrape", link=url):
+        try:
+            response = http_client.get(url, priority=priority)
+        except requests.exceptions.RequestException as e:
+            raise ScrapeError(f"An error occurred: {e}") from e
+        sources = extract_image_sources(response.text)
+    # The last image is the preview of the page, not an observation photo
+    img_sans_preview = sources[:-1]
+    img_url_lst = []
+    for src in img_sans_preview:
+        # Relative to the page, so a local stand-in of the site serves the images too
+        img_url_lst.append(urljoin(url, src.rsplit('?')[0]))
+    if len(img_url_lst) == 0:
+        raise ScrapeError("Image tag with the specified criteria not found.")
+    scrape_cache.put(url, img_url_lst)
+    return img_url_lst
+
+
+# Download the raw bytes of an image, without any caching
+def fetch_image(image_src, priority=http_client.BACKGROUND):
+    return http_client.get(image_src, priority=priority).content
+
+
+# Return the raw bytes of an image from an archive, the cache or the network.
+# Images from a bundle are memoryviews into the mapped file, not bytes.
+def download_image(image_src, priority=http_client.BACKGROUND):
+    for archive in archives:
+        img_data = archive.image(image_src)
+        if img_data is not None:
+            perf.count("image.archive_hit")
+            return img_data
+    img_data = image_cache.get(image_src)
+    if img_data is not None:
+        perf.count("image.cache_hit")
+        return img_data
+    perf.count("image.miss")
+    with perf.timer("download", url=image_src):
+        img_data = fetch_image(image_src, priority)
+    perf.count("image.bytes_downloaded", len(img_data))
+    image_cache.put(image_src, img_data)
+    return img_data
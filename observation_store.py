@@ -0,0 +1,167 @@
+"""Observations of an export in an indexed SQLite database.
+
+An alternative to keeping the whole export in a DataFrame: the CSV is
+imported once, the work list of an app is a query, every saved row is a
+single-row UPDATE committed at once, and exporting streams the table back
+to CSV without building a frame. The GUIs open such a database directly
+when it is selected instead of a CSV file.
+
+    python observation_store.py import export.csv season.db
+    python observation_store.py export season.db submitted.csv
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+import threading
+
+import pandas as pd
+
+from observation_data import COLUMN_DTYPES, read_csv_flexible
+
+# File name endings the GUIs open as a database instead of a CSV export
+STORE_SUFFIXES = (".db", ".sqlite")
+IMPORT_CHUNK = 10_000
+EXPORT_BATCH = 5_000
+INDEXED_COLUMNS = ["id", "validator", "flower_validator", "landuse"]
+
+# The same selections as hummel_todo and flower_todo in observation_data.
+# A missing value is NULL, and "flower" IS NOT 'no' keeps NULL rows like the
+# pandas comparison does.
+WORK_LIST_QUERIES = {
+    "hummel": (
+        '("validator.name" IS NULL OR "validator.name" IN (\'Photo recognition api\', \'Automatic validation\'))'
+        ' AND "landuse" = \'AX_Landwirtschaft\''
+        ' AND ("validator" IS NULL OR "validator" IN (\'LK\', \'Test\'))'
+    ),
+    "flower": (
+        '(("validator.name" IS NOT NULL'
+        ' AND "validator.name" NOT IN (\'Photo recognition api\', \'Automatic validation\'))'
+        ' OR "validator" IN (\'SO\', \'JM\'))'
+        ' AND "landuse" = \'AX_Landwirtschaft\''
+        ' AND ("flower_validator" IS NULL OR "flower_validator" IN (\'LK\', \'Test\'))'
+        ' AND "flower" IS NOT \'no\''
+    ),
+}
+
+
+def quote(column):
+    """Quote a column name for SQL; export columns contain dots."""
+    return '"' + column.replace('"', '""') + '"'
+
+
+def is_store(filepath):
+    return filepath.lower().endswith(STORE_SUFFIXES)
+
+
+class ObservationStore():
+    """Read and update the observations table of a database made by ``import_csv``."""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No observation database at '{path}'")
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")  # Saves do not rewrite the database file
+
+    def columns(self):
+        with self.lock:
+            return [row[1] for row in self.db.execute("PRAGMA table_info(observations)")]
+
+    def add_missing_columns(self, columns):
+        """Ensure the columns edited by an app exist, like add_missing_columns."""
+        existing = self.columns()
+        with self.lock, self.db:
+            for col in columns:
+                if col not in existing:
+                    self.db.execute(f"ALTER TABLE observations ADD COLUMN {quote(col)} TEXT")
+
+    def todo(self, app):
+        """Return the work list of ``app`` ("hummel" or "flower") as a DataFrame."""
+        query = f"SELECT * FROM observations WHERE {WORK_LIST_QUERIES[app]} ORDER BY rowid"
+        with self.lock:
+            df = pd.read_sql_query(query, self.db)
+        # Same dtypes as read_csv_flexible, so the GUIs can edit the frame
+        for col, dtype in COLUMN_DTYPES.items():
+            if col in df.columns:
+                df[col] = df[col].astype(dtype)
+        return df
+
+    def update(self, obs_id, values):
+        """Store the edited ``values`` of observation ``obs_id`` in one transaction."""
+        assignments = ", ".join(f"{quote(col)} = ?" for col in values)
+        with self.lock, self.db:
+            # Like build_id_index, a duplicated id refers to its first row
+            self.db.execute(
+                f"UPDATE observations SET {assignments} "
+                "WHERE rowid = (SELECT rowid FROM observations WHERE id = ? ORDER BY rowid LIMIT 1)",
+                [*values.values(), int(obs_id)],
+            )
+
+    def export_csv(self, filepath, sep=";"):
+        """Write all observations to ``filepath`` in batches, without loading them into memory."""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", newline="", encoding="utf-8") as f, self.lock:
+                writer = csv.writer(f, delimiter=sep)
+                cursor = self.db.execute("SELECT * FROM observations ORDER BY rowid")
+                writer.writerow([description[0] for description in cursor.description])
+                rows = cursor.fetchmany(EXPORT_BATCH)
+                while rows:
+                    writer.writerows(rows)
+                    rows = cursor.fetchmany(EXPORT_BATCH)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def import_csv(csv_path, db_path):
+    """Import the export ``csv_path`` into a new database at ``db_path`` and open it."""
+    if os.path.exists(db_path):
+        raise FileExistsError(f"'{db_path}' exists already")
+    df = read_csv_flexible(csv_path)
+    db = sqlite3.connect(db_path)
+    try:
+        with db:
+            df.to_sql("observations", db, index=False, chunksize=IMPORT_CHUNK)
+            for col in INDEXED_COLUMNS:
+                if col in df.columns:
+                    db.execute(f"CREATE INDEX {quote('observations_' + col)} ON observations ({quote(col)})")
+    finally:
+        db.close()
+    return ObservationStore(db_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="import an observation export into a new database")
+    importer.add_argument("csv_file")
+    importer.add_argument("db_file")
+    exporter = commands.add_parser("export", help="write the observations of a database to CSV")
+    exporter.add_argument("db_file")
+    exporter.add_argument("csv_file")
+    exporter.add_argument("--sep", default=";", help="column separator (default: ;)")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = import_csv(args.csv_file, args.db_file)
+        print(f"Imported '{args.csv_file}' into '{args.db_file}' ({len(store.columns())} columns)")
+    else:
+        store = ObservationStore(args.db_file)
+        store.export_csv(args.csv_file, sep=args.sep)
+        print(f"Exported '{args.db_file}' to '{args.csv_file}'")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
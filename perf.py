@@ -0,0 +1,187 @@
+"""Optional timing instrumentation of the hot paths.
+
+Off by default: ``timer`` then returns a shared no-op context manager and
+``count`` and ``record`` return at once, so the instrumented code pays one
+function call. ``enable()`` (the GUIs call it for --perf or HUMMEL_PERF=1)
+starts writing every measurement as one JSON line to a per-session log and
+collects the numbers for ``summary()`` and ``report()``.
+
+    with perf.timer("decode", url=url):
+        img = ...
+    perf.count("image.cache_hit")
+    perf.record("time_to_first_image", seconds, link=link)
+"""
+import json
+import os
+import statistics
+import threading
+import time
+
+from image_cache import default_cache_dir
+
+enabled = False
+
+_lock = threading.Lock()
+_log = None
+_log_path = None
+_started = None
+_durations = {}  # name -> list of seconds
+_counters = {}  # name -> number
+_validated = set()  # ids of the observations validated in this session
+
+# Counter prefixes whose "hit" and "miss" counters are reported as a hit rate
+HIT_RATE_SOURCES = ["scrape", "image", "photo"]
+
+
+class _NullTimer():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer():
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        record(self.name, time.perf_counter() - self.start, **self.fields)
+        return False
+
+
+def default_log_dir():
+    return os.path.join(default_cache_dir(), "perf")
+
+
+def enable(log_dir=None):
+    """Start measuring and write the session log to ``log_dir``; return its path."""
+    global enabled, _log, _log_path, _started
+    log_dir = log_dir or default_log_dir()
+    os.makedirs(log_dir, exist_ok=True)
+    with _lock:
+        _started = time.time()
+        _log_path = os.path.join(log_dir, time.strftime("session_%Y%m%d_%H%M%S.jsonl", time.localtime(_started)))
+        _log = open(_log_path, "a", encoding="utf-8", buffering=1)
+        _write({"event": "session_start", "pid": os.getpid()})
+        enabled = True
+    return _log_path
+
+
+def _write(entry):
+    # Called with _lock held; measurements of worker threads may arrive after report()
+    if _log is None:
+        return
+    entry["t"] = round(time.time() - _started, 4)
+    _log.write(json.dumps(entry, default=str) + "\n")
+
+
+def timer(name, **fields):
+    """Context manager recording how long its body takes as ``name``."""
+    if not enabled:
+        return _NULL_TIMER
+    return _Timer(name, fields)
+
+
+def record(name, seconds, **fields):
+    """Record a duration measured by the caller."""
+    if not enabled:
+        return
+    with _lock:
+        _durations.setdefault(name, []).append(seconds)
+        _write({"event": name, "seconds": round(seconds, 6), **fields})
+
+
+def count(name, value=1):
+    """Add ``value`` to counter ``name``."""
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def validated(obs_id):
+    """Note that the user validated observation ``obs_id``."""
+    if not enabled:
+        return
+    with _lock:
+        _validated.add(obs_id)
+
+
+def _timing(values):
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 1),
+        "p90_ms": round(ordered[int(0.9 * (len(ordered) - 1))] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+        "total_s": round(sum(ordered), 3),
+    }
+
+
+def summary(http_stats=None, limiter_status=None):
+    """Return the numbers of this session as a dict."""
+    with _lock:
+        hours = max(time.time() - _started, 1e-9) / 3600 if _started else 0.0
+        result = {
+            "session_minutes": round(hours * 60, 1),
+            "timings": {name: _timing(values) for name, values in sorted(_durations.items()) if values},
+            "counters": dict(sorted(_counters.items())),
+            "hit_rates": {},
+            "observations_validated": len(_validated),
+            "observations_per_hour": round(len(_validated) / hours, 1) if hours else 0.0,
+        }
+        for source in HIT_RATE_SOURCES:
+            hits = sum(value for name, value in _counters.items() if name.startswith(f"{source}.") and name.endswith("hit"))
+            misses = _counters.get(f"{source}.miss", 0)
+            if hits + misses:
+                result["hit_rates"][source] = round(hits / (hits + misses), 3)
+    if http_stats is not None:
+        result["bytes_downloaded"] = http_stats["bytes"]
+        result["http"] = http_stats
+    if limiter_status is not None:
+        result["rate_limiter"] = limiter_status
+    return result
+
+
+def report(http_stats=None, limiter_status=None):
+    """Write the summary to the session log, print it and close the log."""
+    global enabled, _log
+    if not enabled:
+        return None
+    result = summary(http_stats, limiter_status)
+    with _lock:
+        _write({"event": "summary", **result})
+        _log.close()
+        _log = None
+        enabled = False
+
+    print(f"Performance summary ({result['session_minutes']} min, log: {_log_path})")
+    first_image = result["timings"].get("time_to_first_image")
+    if first_image:
+        print(f"  time to first image: median {first_image['median_ms']} ms, p90 {first_image['p90_ms']} ms, "
+              f"max {first_image['max_ms']} ms over {first_image['count']} observations")
+    print(f"  observations validated: {result['observations_validated']} "
+          f"({result['observations_per_hour']} per hour)")
+    for source, rate in result["hit_rates"].items():
+        print(f"  {source} cache hit rate: {rate:.0%}")
+    if "bytes_downloaded" in result:
+        print(f"  downloaded: {result['bytes_downloaded'] / 1e6:.1f} MB")
+        print(f"  HTTP statistics: {result['http']}")
+    if "rate_limiter" in result:
+        print(f"  rate limiter: {result['rate_limiter']}")
+    for name, timing in result["timings"].items():
+        if name != "time_to_first_image":
+            print(f"  {name:<20} {timing['count']:6d}x  median {timing['median_ms']:8.1f} ms  "
+                  f"p90 {timing['p90_ms']:8.1f} ms  total {timing['total_s']:8.2f} s")
+    return result
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+import perf
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class PhotoCache():
+    """Bounded LRU cache of rendered Tk images, keyed by image URL and render size.
+
+    The size of an entry is estimated as width x height x 4 bytes, which is
+    what Tk keeps per photo image. When the budget is exceeded the least
+    recently used entries are dropped. The Tk image itself is deleted by
+    ImageTk.PhotoImage once the last reference is gone, so an evicted image
+    that is still shown on a canvas (which holds its own reference) stays
+    visible until it is replaced.
+
+    Must only be used from the Tk thread.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (url, size) -> (photo, bytes)
+        self.total = 0
+
+    def get(self, url, size):
+        entry = self.entries.get((url, size))
+        if entry is None:
+            perf.count("photo.miss")
+            return None
+        perf.count("photo.hit")
+        self.entries.move_to_end((url, size))
+        return entry[0]
+
+    def put(self, url, size, photo):
+        key = (url, size)
+        if key in self.entries:
+            self.total -= self.entries.pop(key)[1]
+        nbytes = photo.width() * photo.height() * 4
+        self.entries[key] = (photo, nbytes)
+        self.total += nbytes
+        # Never evict the entry just added, it is about to be displayed
+        while self.total > self.max_bytes and len(self.entries) > 1:
+            _, (evicted, evicted_bytes) = self.entries.popitem(last=False)
+            self.total -= evicted_bytes
+            del evicted
+
+    def clear(self):
+        self.entries.clear()
+        self.total = 0
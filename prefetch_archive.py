@@ -0,0 +1,141 @@
+"""Download all images of a work list into an offline archive.
+
+Reads the export with read_csv_flexible, selects the same observations as
+the bumblebee or flower app and stores their scraped pages and images in an
+archive directory. Interrupted runs can simply be started again: finished
+observations are skipped. Open the archive in a GUI with --archive DIR.
+
+    python prefetch_archive.py export.csv --app hummel --archive archive --workers 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import http_client
+from image_archive import ImageArchive
+from observation_data import WORK_LISTS, add_missing_columns, read_csv_flexible
+from observation_scraper import ScrapeError, fetch_image, get_image_src
+from rate_limiter import RateLimiter
+
+
+class Progress():
+    """Thread-safe counters with a periodic one-line report."""
+
+    def __init__(self, total, interval=5.0):
+        self.total = total
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.last_report = 0.0
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.images = 0
+        self.bytes = 0
+
+    def add(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+            now = time.monotonic()
+            if now - self.last_report >= self.interval:
+                self.last_report = now
+                print(self.line(), flush=True)
+
+    def line(self):
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        finished = self.done + self.skipped + self.failed
+        fetched = self.done + self.failed
+        rate = fetched / elapsed
+        remaining = self.total - finished
+        eta = f"{remaining / rate / 60:.0f} min" if rate > 0 else "?"
+        limits = http_client.limiter.status()
+        return (f"{finished}/{self.total} observations ({self.skipped} already archived, {self.failed} failed), "
+                f"{self.images} images, {self.bytes / 1e6:.1f} MB, "
+                f"{rate:.2f} obs/s, {self.bytes / 1e6 / elapsed:.2f} MB/s, ETA {eta}, "
+                f"limit {limits['rate']} req/s x {limits['concurrency']}, {limits['queued_background']} queued")
+
+
+def archive_observation(archive, link, progress):
+    if archive.is_complete(link):
+        progress.add(skipped=1)
+        return
+    try:
+        image_urls = archive.image_urls(link)
+        if image_urls is None:
+            image_urls = get_image_src(link)
+            archive.pages.put(link, image_urls)
+        images = downloaded = 0
+        for url in image_urls:
+            if not archive.images.contains(url):
+                img_data = fetch_image(url)
+                archive.images.put(url, img_data)
+                images += 1
+                downloaded += len(img_data)
+    except (ScrapeError, requests.exceptions.RequestException) as e:
+        print(f"Failed {link}: {e}", file=sys.stderr)
+        progress.add(failed=1)
+        return
+    progress.add(done=1, images=images, bytes=downloaded)
+
+
+def select_links(data_file, app, limit=None):
+    """Return the observation links of the work list of ``app`` in ``data_file``."""
+    required_columns, select_todo = WORK_LISTS[app]
+    data_all = read_csv_flexible(data_file)
+    add_missing_columns(data_all, required_columns)
+    data_todo = select_todo(data_all)
+    links = [link for link in data_todo["link"].dropna().unique().tolist() if link.strip()]
+    return data_todo, links[:limit] if limit else links
+
+
+def build_archive(archive, links, workers):
+    """Fetch every observation in ``links`` that is not complete in ``archive`` yet."""
+    # One pooled connection per worker, the rate limiter adapts how many are used
+    http_client.session = http_client.make_session(max_connections=workers)
+    http_client.limiter = RateLimiter(max_concurrency=workers)
+    progress = Progress(len(links))
+    print(f"Archiving {len(links)} observations into {os.path.abspath(archive.directory)} with {workers} workers")
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(archive_observation, archive, link, progress) for link in links]
+        for future in as_completed(futures):
+            future.result()
+    except KeyboardInterrupt:
+        print("Interrupted, run the same command again to resume.")
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    finally:
+        executor.shutdown()
+        print(progress.line())
+        print(f"HTTP statistics: {http_client.stats.snapshot()}")
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_file", help="observation export (CSV)")
+    parser.add_argument("--app", choices=sorted(WORK_LISTS), default="hummel",
+                        help="select the observations of this app (default: hummel)")
+    parser.add_argument("--archive", required=True, help="archive directory, created if missing")
+    parser.add_argument("--workers", type=int, default=4, help="observations fetched in parallel (default: 4)")
+    parser.add_argument("--limit", type=int, help="only archive the first N observations")
+    args = parser.parse_args()
+
+    data_todo, links = select_links(args.data_file, args.app, args.limit)
+    archive = ImageArchive(args.archive)
+    try:
+        build_archive(archive, links, args.workers)
+    except KeyboardInterrupt:
+        pass
+    archive.close()
+
+
+if __name__ == "__main__":
+    main()
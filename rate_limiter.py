@@ -0,0 +1,114 @@
+import threading
+import time
+
+# Priorities of waiting requests, lower goes first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Defaults for observation.org, in requests per second
+DEFAULT_RATE = 4.0
+MIN_RATE = 0.5
+MAX_RATE = 20.0
+RATE_STEP = 0.25
+
+
+class RateLimiter():
+    """Token bucket with an adaptive concurrency window, shared by all requests.
+
+    Every request takes a token from a bucket refilled at ``rate`` per second
+    and a slot of the concurrency window. Both adapt with AIMD: every fast,
+    successful response increases them a little, while a 429, a server error,
+    a connection failure or a response slower than ``target_latency`` halves
+    them, at most once per ``target_latency`` seconds. A ``Retry-After`` pauses
+    all requests until it has passed.
+
+    Requests waiting with priority INTERACTIVE are always let through before
+    BACKGROUND ones and may use one slot more than the window, so the image
+    the user is waiting for is not queued behind a prefetch.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=8, min_rate=MIN_RATE, max_rate=MAX_RATE,
+                 min_concurrency=1, max_concurrency=5, target_latency=2.0):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.concurrency = float(min(2, max_concurrency))
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.in_flight = 0
+        self.waiting = [0, 0]  # Number of waiting requests per priority
+        self.condition = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _wait_time(self, priority, now):
+        """Return 0 if a request may start now, else seconds to wait (None: until notified)."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if priority == BACKGROUND and self.waiting[INTERACTIVE]:
+            return None
+        limit = int(self.concurrency) + (1 if priority == INTERACTIVE else 0)
+        if self.in_flight >= limit:
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0
+
+    def acquire(self, priority=BACKGROUND):
+        """Block until a request with ``priority`` may be sent."""
+        with self.condition:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_time(priority, now)
+                    if wait == 0:
+                        break
+                    self.condition.wait(wait)
+                self.tokens -= 1
+                self.in_flight += 1
+            finally:
+                self.waiting[priority] -= 1
+                self.condition.notify_all()
+
+    def release(self, latency, failed=False, retry_after=None):
+        """Report the end of a request and adapt rate and concurrency to it.
+
+        ``failed`` marks a throttled, failed or server error response and
+        ``retry_after`` is the delay in seconds requested by the server.
+        """
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if failed or latency > self.target_latency:
+                if now - self.last_decrease > self.target_latency:
+                    self.last_decrease = now
+                    self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+                    self.rate = max(self.min_rate, self.rate / 2)
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                self.rate = min(self.max_rate, self.rate + RATE_STEP)
+            self.condition.notify_all()
+
+    def status(self):
+        """Return the current limits and queue depth."""
+        with self.condition:
+            return {
+                "rate": round(self.rate, 2),
+                "concurrency": int(self.concurrency),
+                "in_flight": self.in_flight,
+                "queued_interactive": self.waiting[INTERACTIVE],
+                "queued_background": self.waiting[BACKGROUND],
+                "paused_seconds": round(max(0.0, self.paused_until - time.monotonic()), 1),
+            }
@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from image_cache import default_cache_dir
+
+DEFAULT_TTL = float(os.environ.get("HUMMEL_SCRAPE_TTL", 7 * 24 * 3600))
+
+
+class ScrapeCache():
+    """Persistent cache mapping observation links to their list of image URLs.
+
+    Entries older than ``ttl`` seconds are treated as missing. Only real results
+    are stored, failed scrapes are never written to the cache.
+    """
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.path = path or os.path.join(default_cache_dir(), "scrape.sqlite")
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS pages (link TEXT PRIMARY KEY, image_urls TEXT NOT NULL, fetched REAL NOT NULL)"
+            )
+
+    def get(self, link):
+        """Return the cached image URLs of ``link`` or None if missing or expired."""
+        with self.lock:
+            row = self.db.execute("SELECT image_urls, fetched FROM pages WHERE link = ?", (link,)).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, link, image_urls):
+        if not isinstance(image_urls, list) or not image_urls:
+            raise ValueError("Only non-empty lists of image URLs can be cached.")
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO pages (link, image_urls, fetched) VALUES (?, ?, ?)",
+                (link, json.dumps(image_urls), time.time()),
+            )
+
+    def invalidate(self, link):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM pages WHERE link = ?", (link,))
+
+    def clear(self):
+        """Remove every cached page."""
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM pages")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the cache of scraped observation pages.")
+    parser.add_argument("--clear", action="store_true", help="remove every cached page")
+    parser.add_argument("--invalidate", metavar="LINK", action="append", default=[], help="remove a single observation link")
+    args = parser.parse_args()
+    cache = ScrapeCache()
+    if args.clear:
+        cache.clear()
+    for link in args.invalidate:
+        cache.invalidate(link)
+    count = cache.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+    print(f"{count} cached pages in {cache.path}")
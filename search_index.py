@@ -0,0 +1,200 @@
+import bisect
+import heapq
+import re
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Split a casefolded name into its words, e.g. genus and epithet."""
+    return TOKEN_PATTERN.findall(text)
+
+
+def prefix_distance(query, word, limit):
+    """Return the smallest Levenshtein distance between ``query`` and a prefix of ``word``.
+
+    Returns ``limit + 1`` as soon as the distance is known to exceed ``limit``.
+    """
+    word = word[:len(query) + limit]
+    previous = list(range(len(query) + 1))
+    best = previous[-1] if len(query) <= limit else limit + 1
+    for i, char_w in enumerate(word, 1):
+        current = [i]
+        for j, char_q in enumerate(query, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_q != char_w)))
+        if min(current) > limit:
+            break
+        best = min(best, current[-1])
+        previous = current
+    return best
+
+
+def typo_limit(length):
+    """Number of typos tolerated in a query word of ``length`` characters."""
+    if length < 4:
+        return 0
+    if length < 8:
+        return 1
+    return 2
+
+
+class SearchIndex():
+    """Case-insensitive search over a fixed list of options, e.g. taxon names.
+
+    Every casefolded option is split into its 1-, 2- and 3-grams once. A query
+    only has to intersect the posting lists of its own n-grams and check the
+    few remaining candidates, instead of scanning all options on each keystroke.
+    ``rank`` adds a fuzzy, word based search on top of a second, word level index.
+    """
+
+    max_gram = 3
+
+    def __init__(self, options):
+        self.options = list(options)
+        self.folded = [str(option).casefold() for option in self.options]
+        self.postings = {}  # n-gram -> sorted list of option positions
+        for position, text in enumerate(self.folded):
+            grams = set()
+            for n in range(1, self.max_gram + 1):
+                grams.update(text[k:k + n] for k in range(len(text) - n + 1))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+        self.last_query = ""
+        self.last_result = list(range(len(self.options)))
+
+        # Word level index for the ranked search
+        self.tokens = [tokenize(text) for text in self.folded]
+        self.token_options = {}  # word -> positions of the options containing it
+        for position, words in enumerate(self.tokens):
+            for word in words:
+                self.token_options.setdefault(word, set()).add(position)
+        self.vocabulary = sorted(self.token_options)
+        self.token_bigrams = {}  # bigram -> words containing it, to find typo candidates
+        for word in self.vocabulary:
+            for k in range(len(word) - 1):
+                self.token_bigrams.setdefault(word[k:k + 2], set()).add(word)
+
+    def search(self, query):
+        """Return the sorted positions of all options containing ``query``."""
+        query = query.strip().casefold()
+        if not query:
+            result = list(range(len(self.options)))
+        elif self.last_query and query.startswith(self.last_query):
+            # Typing one more character can only narrow the previous result
+            result = [i for i in self.last_result if query in self.folded[i]]
+        else:
+            result = self._lookup(query)
+        self.last_query, self.last_result = query, result
+        return result
+
+    def _lookup(self, query):
+        n = min(self.max_gram, len(query))
+        lists = []
+        for gram in {query[k:k + n] for k in range(len(query) - n + 1)}:
+            postings = self.postings.get(gram)
+            if postings is None:
+                return []
+            lists.append(postings)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates.intersection_update(postings)
+            if not candidates:
+                return []
+        return [i for i in sorted(candidates) if query in self.folded[i]]
+
+    def _word_matches(self, query_word):
+        """Return {word: score} for all index words matching one typed word."""
+        matches = {}
+        # Words starting with the typed text, found by binary search in the sorted vocabulary.
+        # Typos are only considered when the text is not the start of any word.
+        start = bisect.bisect_left(self.vocabulary, query_word)
+        for word in self.vocabulary[start:]:
+            if not word.startswith(query_word):
+                break
+            matches[word] = 1.0 if word == query_word else 0.9 - 0.2 * (1 - len(query_word) / len(word))
+        limit = typo_limit(len(query_word))
+        if limit and not matches:
+            # Typo candidates share enough bigrams with the typed text
+            needed = len(query_word) - 1 - 2 * limit
+            counts = {}
+            for k in range(len(query_word) - 1):
+                for word in self.token_bigrams.get(query_word[k:k + 2], ()):
+                    counts[word] = counts.get(word, 0) + 1
+            for word, shared in counts.items():
+                if word in matches or shared < needed:
+                    continue
+                # Compare with the start of the word, the user may not have typed all of it
+                distance = prefix_distance(query_word, word, limit)
+                if distance <= limit:
+                    matches[word] = 0.7 - 0.15 * distance
+        return matches
+
+    def rank(self, query, limit=50):
+        """Return the positions of the ``limit`` best options for ``query``, best first.
+
+        Each typed word is matched against the words of an option as a prefix
+        ("b pasc" finds "Bombus pascuorum"), with a few typos tolerated for
+        longer words. Options whose words match in the typed order, starting
+        with the first word, rank highest. Plain substring matches of the
+        whole query are kept with a low score.
+        """
+        query = query.strip().casefold()
+        if not query:
+            return list(range(len(self.options)))[:limit] if limit else list(range(len(self.options)))
+        query_words = tokenize(query)
+        word_matches = [self._word_matches(word) for word in query_words]
+
+        candidates = None
+        for matches in word_matches:
+            positions = set()
+            for word in matches:
+                positions.update(self.token_options[word])
+            candidates = positions if candidates is None else candidates & positions
+        candidates = candidates or set()
+
+        scored = []
+        for position in candidates:
+            score = self._score(self.tokens[position], word_matches)
+            if score is not None:
+                scored.append((score, -len(self.folded[position]), -position))
+        # Keep the old substring behaviour for queries spanning words, like "us bo"
+        for position in self.search(query):
+            if position not in candidates:
+                scored.append((0.3, -len(self.folded[position]), -position))
+        best = heapq.nlargest(limit, scored) if limit else sorted(scored, reverse=True)
+        return [-position for _, _, position in best]
+
+    def _score(self, words, word_matches):
+        total = 0.0
+        next_word = 0
+        in_order = True
+        for matches in word_matches:
+            # Prefer the best scoring word after the previously matched one
+            best = None
+            for at, word in enumerate(words):
+                score = matches.get(word)
+                if score is not None and (best is None or (at >= next_word, score) > (best[1] >= next_word, best[0])):
+                    best = (score, at)
+            if best is None:
+                return None
+            in_order = in_order and best[1] >= next_word
+            next_word = best[1] + 1
+            total += best[0]
+        score = total / len(word_matches)
+        if in_order:
+            score += 0.2
+        if word_matches[0].get(words[0]) is not None:
+            score += 0.1  # The first typed word matches the genus
+        return score
+
+
+_indexes = {}
+
+
+def index_for(options):
+    """Return a shared SearchIndex for ``options``, building it on first use."""
+    key = tuple(options)
+    if key not in _indexes:
+        _indexes[key] = SearchIndex(options)
+    return _indexes[key]
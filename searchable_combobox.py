@@ -1,10 +1,19 @@
 import tkinter as tk
 from PIL import Image, ImageTk
+from search_index import index_for
+
+# Wait this long after the last keystroke before filtering the options
+DEBOUNCE_MS = 80
+# Number of ranked matches shown while typing
+MAX_RESULTS = 50
 
 class SearchableComboBox():
     def __init__(self, parent, options):
         self.dropdown_id = None
+        self.filter_id = None
         self.options = options
+        self.index = index_for(options)
+        self.shown = list(range(len(options)))  # Positions of the options in the listbox
 
         # Create a wrapper Frame to manage the layout
         self.wrapper = tk.Frame(parent)
@@ -31,18 +40,40 @@ class SearchableComboBox():
         self.wrapper.grid(**kwargs)
 
     def on_entry_key(self, event):
-        typed_value = event.widget.get().strip().lower()
-        if not typed_value:
-            self.listbox.delete(0, tk.END)
-            for option in self.options:
-                self.listbox.insert(tk.END, option)
+        # Filter once the user pauses typing instead of on every key
+        if self.filter_id:
+            self.entry.after_cancel(self.filter_id)
+        self.filter_id = self.entry.after(DEBOUNCE_MS, self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_id = None
+        typed_value = self.entry.get()
+        if typed_value.strip():
+            self.update_listbox(self.index.rank(typed_value, limit=MAX_RESULTS))
         else:
-            self.listbox.delete(0, tk.END)
-            filtered_options = [option for option in self.options if typed_value in option.lower()]
-            for option in filtered_options:
-                self.listbox.insert(tk.END, option)
+            self.update_listbox(list(range(len(self.options))))
         self.show_dropdown()
 
+    def update_listbox(self, matches):
+        """Change the listbox from showing self.shown to showing ``matches``.
+
+        Rows that stay the same at the start and at the end of the list are
+        kept, only the differing middle part is deleted and inserted.
+        """
+        old = self.shown
+        start = 0
+        while start < len(old) and start < len(matches) and old[start] == matches[start]:
+            start += 1
+        end_old, end_new = len(old), len(matches)
+        while end_old > start and end_new > start and old[end_old - 1] == matches[end_new - 1]:
+            end_old -= 1
+            end_new -= 1
+        if end_old > start:
+            self.listbox.delete(start, end_old - 1)
+        if end_new > start:
+            self.listbox.insert(start, *[self.options[k] for k in matches[start:end_new]])
+        self.shown = matches
+
     def on_select(self, event):
         selected_index = self.listbox.curselection()
         if selected_index:
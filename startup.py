@@ -0,0 +1,95 @@
+import importlib
+import os
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+
+# Imported on a background thread while the window is already shown and the
+# user picks the data file; together they take most of the start-up time
+HEAVY_MODULES = ["pandas", "observation_data", "requests", "http_client", "observation_scraper", "PIL.ImageTk"]
+
+
+def preload(modules=HEAVY_MODULES):
+    """Import ``modules`` on a daemon thread and return the thread."""
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass  # The regular import on the main thread reports it
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def probe(stage):
+    """Note the time of a start-up ``stage`` for benchmarks/bench_startup.py.
+
+    Only active if HUMMEL_STARTUP_PROBE names a file; the frozen GUIs have no
+    console, so the times are appended to that file.
+    """
+    path = os.environ.get("HUMMEL_STARTUP_PROBE")
+    if path:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"{stage} {time.time():.6f}\n")
+
+
+class StartupProgress():
+    """Message and progress bar shown in the main window while the app loads.
+
+    ``run`` executes a loading step on a thread and keeps the window painted
+    and movable until it is done. Closing the window during start-up exits.
+    """
+
+    def __init__(self, root, steps):
+        self.root = root
+        self.frame = tk.Frame(root, padx=40, pady=40)
+        self.label = tk.Label(self.frame, text="Starting...", width=40, anchor="w")
+        self.label.pack(fill="x")
+        self.bar = ttk.Progressbar(self.frame, length=300, maximum=steps)
+        self.bar.pack(fill="x", pady=(10, 0))
+        self.frame.pack()
+        self.update()
+        probe("window")
+
+    def update(self):
+        try:
+            self.root.update()
+        except tk.TclError:
+            raise SystemExit(0)  # The window was closed
+
+    def step(self, message):
+        """Show ``message`` for the next step, which runs on the Tk thread."""
+        self.label.config(text=message)
+        self.bar.step(1)
+        self.update()
+
+    def run(self, message, fn, *args, **kwargs):
+        """Show ``message``, run ``fn(*args, **kwargs)`` on a thread and return its result."""
+        self.step(message)
+        result = {}
+
+        def target():
+            try:
+                result["value"] = fn(*args, **kwargs)
+            except BaseException as e:
+                result["error"] = e
+        thread = threading.Thread(target=target, name="startup", daemon=True)
+        thread.start()
+        while thread.is_alive():
+            self.update()
+            thread.join(0.03)
+        if "error" in result:
+            raise result["error"]
+        return result.get("value")
+
+    def close(self):
+        self.frame.destroy()
+
+
+def finished(root):
+    """Note that the app is ready; when probed, close it once it is drawn."""
+    probe("ready")
+    if os.environ.get("HUMMEL_STARTUP_PROBE"):
+        root.after_idle(root.destroy)
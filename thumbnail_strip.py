@@ -0,0 +1,60 @@
+import tkinter as tk
+
+THUMB_SIZE = (64, 64)
+
+
+class ThumbnailStrip():
+    """Horizontal, scrollable row of small images with one slot per image.
+
+    Slots are created as grey placeholders and filled with ``set_image`` as the
+    thumbnails arrive. Clicking a slot calls ``command(index)``.
+    """
+
+    def __init__(self, parent, command, width=300, size=THUMB_SIZE, gap=6):
+        self.command = command
+        self.size = size
+        self.gap = gap
+        self.photos = {}  # slot index -> PhotoImage, keeps the Tk images alive
+
+        self.frame = tk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, width=width, height=size[1] + 2 * gap, bg="gray85", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="ew")
+        self.scrollbar = tk.Scrollbar(self.frame, orient="horizontal", command=self.canvas.xview)
+        self.scrollbar.grid(row=1, column=0, sticky="ew")
+        self.canvas.configure(xscrollcommand=self.scrollbar.set)
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def slot_center(self, index):
+        x = self.gap + index * (self.size[0] + self.gap) + self.size[0] // 2
+        return x, self.gap + self.size[1] // 2
+
+    def clear(self):
+        self.canvas.delete("all")
+        self.photos = {}
+        self.canvas.configure(scrollregion=(0, 0, 0, 0))
+
+    def show_slots(self, count):
+        """Draw ``count`` empty placeholders."""
+        self.clear()
+        for index in range(count):
+            x, y = self.slot_center(index)
+            half_w, half_h = self.size[0] // 2, self.size[1] // 2
+            self.canvas.create_rectangle(x - half_w, y - half_h, x + half_w, y + half_h,
+                                         fill="gray70", outline="gray70", width=2, tags=("frame", f"frame{index}", f"slot{index}"))
+            self.canvas.tag_bind(f"slot{index}", "<Button-1>", lambda event, i=index: self.command(i))
+        width = self.gap + count * (self.size[0] + self.gap)
+        self.canvas.configure(scrollregion=(0, 0, width, self.size[1] + 2 * self.gap))
+
+    def set_image(self, index, photo):
+        x, y = self.slot_center(index)
+        self.canvas.create_image(x, y, image=photo, anchor="center", tags=(f"slot{index}",))
+        self.canvas.tag_raise(f"frame{index}")
+        self.canvas.itemconfigure(f"frame{index}", fill="")
+        self.photos[index] = photo
+
+    def select(self, index):
+        """Outline the slot of the image shown on the main canvas."""
+        self.canvas.itemconfigure("frame", outline="gray70")
+        self.canvas.itemconfigure(f"frame{index}", outline="red")
@@ -0,0 +1,76 @@
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+
+class UiWorker():
+    """Run blocking work on a thread pool and hand the results back to Tk.
+
+    Tk widgets may only be touched from the thread running ``mainloop``, so the
+    callbacks passed to ``submit`` are not called by the worker threads. Instead
+    every finished future is put on a queue that is drained from the Tk event
+    loop with ``after()``.
+
+    Jobs submitted with a ``key`` supersede earlier jobs with the same key: the
+    older job is cancelled if it has not started yet and its result is dropped
+    if it has. This is how requests for a row the user already left are
+    discarded.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-worker")
+        self.finished = queue.Queue()
+        self.latest = {}  # key -> most recent Future submitted with that key
+        self.poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None):
+        """Run ``fn(*args)`` in the background.
+
+        ``on_done(result)`` or ``on_error(exception)`` is later called on the Tk
+        thread, unless the job was superseded or cancelled in the meantime.
+        """
+        if key is not None:
+            self.cancel(key)
+        future = self.executor.submit(fn, *args)
+        if key is not None:
+            self.latest[key] = future
+        future.add_done_callback(lambda f: self.finished.put((f, key, on_done, on_error)))
+        return future
+
+    def cancel(self, key):
+        """Cancel the pending job for ``key`` and ignore its result."""
+        future = self.latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def _poll(self):
+        while True:
+            try:
+                future, key, on_done, on_error = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled():
+                continue
+            if key is not None:
+                if self.latest.get(key) is not future:
+                    continue  # Superseded by a newer request
+                del self.latest[key]
+            error = future.exception()
+            try:
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                elif on_done is not None:
+                    on_done(future.result())
+            except Exception as e:
+                print(f"Error in background callback: {e}")
+        self.poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def shutdown(self):
+        try:
+            self.root.after_cancel(self.poll_id)
+        except tk.TclError:
+            pass  # The window is already destroyed
+        self.executor.shutdown(wait=False, cancel_futures=True)